@@ -1,7 +1,11 @@
 import os
 import sys
 import time
-from PyQt5 import QtWidgets, QtCore, uic, QtSvg
+import queue
+import threading
+import logging
+import importlib.util
+from PyQt5 import QtWidgets, QtCore, QtGui, uic, QtSvg
 
 import numpy as np
 # only on linux
@@ -9,11 +13,14 @@ if os.name == 'posix':
     os.environ["QT_QPA_PLATFORM"] = "xcb"
 
 import pyqtgraph as pg
+# Render the live curves with OpenGL when PyOpenGL is installed, the curves set their own antialiasing
+_HAS_OPENGL = importlib.util.find_spec("OpenGL") is not None
+pg.setConfigOptions(useOpenGL=_HAS_OPENGL, enableExperimental=_HAS_OPENGL)
 from driver.PS4824A      import PS4000A
 from driver.enums        import *
 from driver.functions    import unit
 
-from tools import Channel
+from tools import Channel, RingBuffer, m4_downsample, pack_header
 from gui.costumWidgets import ChannelBtn, WelinqSpinBox
 import configparser
 
@@ -23,8 +30,11 @@ from datetime import datetime
 
 DEBUG = False
 
+logger = logging.getLogger(__name__)
+
 # Colors 
 AVAILABLE_CHANNELS = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H']
+CHANNEL_ROWS = {ch: i for i, ch in enumerate(AVAILABLE_CHANNELS)}
 WELINQ_DARK = "#002e21"
 WELINQ_LIGHT = "#d9f175"
 COLORS = ['#d9f175', '#1abc9c','#e67e22', '#3498db', '#9b59b6', '#e74c3c', '#f1c40f', '#2ecc71',  ]
@@ -55,6 +65,8 @@ def calculate_sample_interval(sample_frequency):
     return value, unit
 
 class MainWindow(QtWidgets.QWidget):
+    # Emitted by the recording thread when a write fails, handled in the GUI thread
+    record_error = QtCore.pyqtSignal(str)
     
     def __init__(self):
         super().__init__()
@@ -64,6 +76,7 @@ class MainWindow(QtWidgets.QWidget):
         self.warning_widget.hide()
         self.build_scales_layout()
         self.setup_scope_screen()
+        logger.info("Scope rendered %s OpenGL.", "with" if pg.getConfigOption('useOpenGL') else "without")
 
         self.samplerate_widget = WelinqSpinBox(step=100, min=100, max=4000)
         self.top_widgets.insertWidget(0, self.samplerate_widget)
@@ -81,35 +94,61 @@ class MainWindow(QtWidgets.QWidget):
         self.load_config()
         self.directory_label.setText(self.logging_directory)
 
+        self.size_one_buffer = 200
+        self.max_buffer_size = 2000
+
         # Init the channels
         for i, ch in enumerate(AVAILABLE_CHANNELS):
             channel = Channel.from_dict(name=ch)
+            channel.buffer = RingBuffer(self.max_buffer_size)
             # Settings
             self.settings[ch] = channel
             # UI channel
             widget = ChannelBtn(channel)
             widget.set_color(COLORS[i])
-            widget.update_signal.connect(self.refresh_hardware)
+            widget.update_signal.connect(lambda ch=ch: self.schedule_channel_config(ch))
             widget.name_label.clicked.connect(self.open_channel_settings)
             setattr(self, f"chan_{ch}_widget", widget)
             self.ChannelsLayout.addWidget(getattr(self, f"chan_{ch}_widget"))
             
-            # Initialize the plot
-            self.plots[ch] = self.scope_screen.plot( [], [], 
+            # Initialize the plot, the samples are always finite and connected
+            self.plots[ch] = pg.PlotCurveItem(
                 name=f'{ch}: {channel.scale/10} V/div', 
-                pen=pg.mkPen(color=COLORS[i], width=1))
+                pen=pg.mkPen(color=COLORS[i], width=1),
+                skipFiniteCheck=True,
+                connect='all',
+                antialias=False)
+            self.scope_screen.addItem(self.plots[ch])
         self.ChannelsLayout.addStretch()
 
         self.define_actions()
 
-        self.size_one_buffer = 200
-        self.max_buffer_size = 2000
-
         # Set up a timer to collect new incoming data.
+        # The interval is derived from the sample rate in 'setup_acquisition'.
         self.timer = QtCore.QTimer()
+        self.timer.setTimerType(QtCore.Qt.PreciseTimer)
         self.timer.setInterval(20)
         self.timer.timeout.connect(self.start_acquisition)
 
+        # Drawing is decoupled from the acquisition, ~30 frames per second is enough
+        self.draw_timer = QtCore.QTimer()
+        self.draw_timer.setInterval(33)
+        self.draw_timer.timeout.connect(self.refresh_plots)
+        self.draw_timer.start()
+
+        # Coalesce the configuration writes, restarting the timer delays the save
+        self.save_config_timer = QtCore.QTimer()
+        self.save_config_timer.setSingleShot(True)
+        self.save_config_timer.setInterval(500)
+        self.save_config_timer.timeout.connect(self.save_config)
+
+        # Coalesce the channel settings changes (offset slider, range buttons)
+        self._pending_channels: set[str] = set()
+        self.channel_config_timer = QtCore.QTimer()
+        self.channel_config_timer.setSingleShot(True)
+        self.channel_config_timer.setInterval(150)
+        self.channel_config_timer.timeout.connect(self.apply_pending_channels)
+
         # Equivalent of start the acquisition
         self.refresh_hardware()
         self.show()
@@ -119,6 +158,7 @@ class MainWindow(QtWidgets.QWidget):
         self.offset_value.valueChanged.connect(self.offset_changed)
         self.record_btn.clicked.connect(self.start_recording)
         self.stop_btn.clicked.connect(self.stop_recording)
+        self.record_error.connect(self.recording_failed)
         self.change_dir_btn.clicked.connect(self.change_directory)
         self.samplerate_widget.valueChanged.connect(self.refresh_hardware)
         self.viewer_btn.clicked.connect(self.open_viewer)
@@ -132,26 +172,61 @@ class MainWindow(QtWidgets.QWidget):
         if directory:
             self.logging_directory = directory
             self.directory_label.setText(directory)
-        self.save_config()
+        self.save_config_timer.start()
 
     def refresh_hardware(self):
         if hasattr(self, "timer"):
             self.timer.stop()
         
-        [channel.buffer.clear() for channel in self.settings.values()]
+        for channel in self.settings.values():
+            channel.buffer.clear()
 
-        for ch in AVAILABLE_CHANNELS:
-            self.settings[ch].buffer.clear()
+        # ADC counts to screen divisions, one row per channel
+        self._scale_factor = np.array(
+            [[self.scope_scale / self.settings[ch].max_adc] for ch in AVAILABLE_CHANNELS], 
+            dtype=np.float32)
         try:
             self.setup_channels()
             self.setup_trigger()
             self.setup_acquisition()
         except Exception as e:
-            self.save_config()
+            self.save_config_timer.start()
             print("Hardware not ocnnected")
 
+        self.update_active_channels()
         self.timer.start()
 
+    def schedule_channel_config(self, ch: str):
+        """ 
+        Apply the settings of a channel after a short delay, 
+        so that dragging the offset slider only reaches the scope once. 
+        """
+        self._pending_channels.add(ch)
+        self.channel_config_timer.start()
+
+    def apply_pending_channels(self):
+        for ch in self._pending_channels:
+            self.apply_channel_config(ch)
+        self._pending_channels.clear()
+
+    def apply_channel_config(self, ch: str):
+        """ Send the settings of a single channel to the scope, without restarting the streaming. """
+        setting = self.settings[ch]
+        try:
+            self.picoscope.set_channel(setting.flag, setting.active, COUPLING.DC, setting.range, setting.offset)
+        except Exception as e:
+            print(f"Channel {ch} settings not applied: {e}")
+            return
+        if self.picoscope.status != 0:
+            # Refused by the driver, already logged by the driver wrapper
+            return
+        # The samples acquired with the previous settings are not comparable anymore
+        setting.buffer.clear()
+
+    def update_active_channels(self):
+        """ Cache the active channels, so the streaming path does not scan all of them. """
+        self._active_channels: list[str] = [ch for ch in AVAILABLE_CHANNELS if self.settings[ch].active]
+
     def connect_scope(self):
         self.picoscope = PS4000A()
         self.picoscope.open_unit()
@@ -159,6 +234,11 @@ class MainWindow(QtWidgets.QWidget):
         batch_serial = self.picoscope.get_unit_info(PICO_INFO.PICO_BATCH_AND_SERIAL)
         self.setWindowTitle(f"PicoSope {variant_info} [{batch_serial}]")
 
+        # The offset limits only depend on the range, ask the scope once for each of them
+        self._offset_limits: dict[RANGE, tuple[float, float]] = {
+            r: self.picoscope.get_analogue_offset(r, COUPLING.DC) for r in RANGE
+            }
+
     # CHANNEL SETTOINGS METHODS
     def open_channel_settings(self):
         widget: ChannelBtn = self.sender().parent()
@@ -204,8 +284,13 @@ class MainWindow(QtWidgets.QWidget):
             button.clicked.connect(self.range_changed)
 
     def activate_channel(self):
-        self.current_channel.channel.active = self.is_on.isChecked()
+        channel = self.current_channel.channel
+        channel.active = self.is_on.isChecked()
         self.current_channel.set_color()
+        self.update_active_channels()
+
+        if not channel.active:
+            self.plots[channel.name].setData([], [])
 
     def range_changed(self):
         # Reset styling
@@ -224,18 +309,14 @@ class MainWindow(QtWidgets.QWidget):
         
         self.current_channel.apply_range(getattr(RANGE, f"RANGE_{range_name}"))
         
+        # Also schedules the hardware update of the channel
         self.offset_changed()
         self.show_offset_values()
 
-        self.refresh_hardware()
-
     def show_offset_values(self):
         if not hasattr(self, "current_channel"): return
         
-        max_offset, min_offset = self.picoscope.get_analogue_offset(
-            self.current_channel.channel.range, 
-            COUPLING.DC
-            )
+        max_offset, min_offset = self._offset_limits[self.current_channel.channel.range]
         
         current_offset = self.current_channel.channel.offset
 
@@ -257,10 +338,7 @@ class MainWindow(QtWidgets.QWidget):
     def offset_changed(self):
         self.current_channel.channel.offset = self.offset_value.value()
 
-        max_offset, min_offset = self.picoscope.get_analogue_offset(
-            self.current_channel.channel.range, 
-            COUPLING.DC
-            )
+        max_offset, min_offset = self._offset_limits[self.current_channel.channel.range]
 
         current_offset = self.current_channel.channel.offset
         
@@ -273,7 +351,7 @@ class MainWindow(QtWidgets.QWidget):
 
         self.offset_slider.setValue(int(current_offset * 1000))
 
-        self.refresh_hardware()
+        self.schedule_channel_config(self.current_channel.channel.name)
 
     # GUI METHODS
     def setup_scope_screen(self):
@@ -291,40 +369,54 @@ class MainWindow(QtWidgets.QWidget):
         # self.scope_screen.setXRange(-self.scope_scale, self.scope_scale)
 
     def add_welinq_logo(self):
-        svg_widget = QtSvg.QSvgWidget("pico_app/gui/Welinq_Logo_Dark.svg")  # Replace with your SVG file path
-        svg_widget.setFixedHeight(25)  # Set the height only
-        svg_widget.setFixedWidth(int(2.84*25))  # Set the height only
-        self.top_widgets.addWidget(svg_widget)
-
-    def update_data(self, data_chunk: dict[str,np.ndarray]):
+        # Rasterize the SVG once, the label then only blits the pixmap on repaint
+        height = 25
+        width = int(2.84*height)
+        ratio = self.devicePixelRatioF()
+
+        renderer = QtSvg.QSvgRenderer("pico_app/gui/Welinq_Logo_Dark.svg")  # Replace with your SVG file path
+        pixmap = QtGui.QPixmap(int(width*ratio), int(height*ratio))
+        pixmap.fill(QtCore.Qt.transparent)
+        painter = QtGui.QPainter(pixmap)
+        renderer.render(painter)
+        painter.end()
+        pixmap.setDevicePixelRatio(ratio)
+
+        logo = QtWidgets.QLabel()
+        logo.setPixmap(pixmap)
+        logo.setFixedSize(width, height)
+        self.top_widgets.addWidget(logo)
+
+    def update_data(self, data_block: np.ndarray):
         """
-        Update the rolling buffer with a new data sample and refresh the plot.
+        Update the rolling buffer with a new data sample. 
+        The plot is refreshed separately by 'refresh_plots'.
         Parameters:
-        data_chunk : dict[str, np.ndarray]
-            A dictionary containing the data for each channel.
+        data_block : np.ndarray
+            The raw samples of all the channels, one row per channel (AVAILABLE_CHANNELS order).
         """
+        # Scale every channel in a single operation
+        scaled = self._scaled_block[:, :data_block.shape[1]]
+        np.multiply(data_block, self._scale_factor, out=scaled, dtype=np.float32)
 
-        for ch in AVAILABLE_CHANNELS:
-            channel = self.settings[ch]
-            
-            if not channel.active:
-                self.plots[channel.name].setData([], [])
-                continue
-    
-            data = data_chunk[ch]
-            data = data  / channel.max_adc * self.scope_scale
-            data = list(data.flatten())
-            channel.buffer.extend(data)
+        for ch in self._active_channels:
+            # The ring buffer drops the oldest samples by itself
+            self.settings[ch].buffer.extend(scaled[CHANNEL_ROWS[ch]])
+
+    def refresh_plots(self):
+        """ Draw the current content of the rolling buffers, at screen rate. """
+        if not hasattr(self, "_x_full"): return
 
-            # If new_data is longer than the buffer, only use the last buffer_size elements.
-            if len(channel.buffer) > self.max_buffer_size:
-                channel.buffer = channel.buffer[-self.max_buffer_size:]
+        # There is no point drawing more than a few points per pixel
+        width = self.scope_screen.width()
 
-            dt = self.sample_interval*unit(self.time_unit)
-            x = np.arange(len(channel.buffer))*dt
+        # Inactive curves are cleared once, in 'activate_channel'
+        for ch in self._active_channels:
+            y = self.settings[ch].buffer.view()
+            x, y = m4_downsample(self._x_full[:len(y)], y, width)
 
             # Update the plot using the current buffer values.
-            self.plots[ch].setData(x, channel.buffer)
+            self.plots[ch].setData(x, y)
     
     def start_recording(self):
         """ 
@@ -343,14 +435,15 @@ class MainWindow(QtWidgets.QWidget):
             
             filename =  f"{folder}/picoscope_ch_{ch}.bin"
 
-            header_end = "\n\n"
-            header = f""
-            header += f"Time Interval: {self.sample_interval*unit(self.time_unit)}\n"
-            header += f"Scale: {channel.scale}\n"
-            header += f"Offset: {channel.offset}"
-            header += header_end
-            self.record_file[ch] = open(filename, 'wb')
-            self.record_file[ch].write(header.encode('utf-8'))
+            self.record_file[ch] = open(filename, 'wb', buffering=1 << 20)
+            self.record_file[ch].write(pack_header(self._dt, channel.scale, channel.offset))
+        # Only the channels with a file are recorded, even if others are enabled meanwhile
+        self._recorded_channels: list[str] = list(self.record_file)
+
+        # The files are written by a worker thread, away from the acquisition
+        self.record_queue = queue.Queue()
+        self.record_thread = threading.Thread(target=self.write_records, daemon=True)
+        self.record_thread.start()
 
         self.record_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
@@ -358,17 +451,50 @@ class MainWindow(QtWidgets.QWidget):
 
     def stop_recording(self):
         """ Stop recording data to the file. """
+        if not self.is_recording: return
         self.is_recording = False
-        [record_file.close() for record_file in self.record_file.values()]
+
+        # Let the writer flush the pending chunks before closing the files
+        self.record_queue.put(None)
+        self.record_thread.join()
+
+        # Closing flushes the file buffers, which can fail as well (disk full)
+        errors = []
+        for ch, record_file in self.record_file.items():
+            try:
+                record_file.close()
+            except OSError as e:
+                errors.append(f"Channel {ch}: {e}")
         self.record_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
+        if errors:
+            QtWidgets.QMessageBox.critical(self, 'Recording', 'The recorded files could not be written completely.\n' + '\n'.join(errors))
+
+    def write_records(self):
+        """ Worker thread writing the queued chunks until a None sentinel is received. """
+        while True:
+            item = self.record_queue.get()
+            if item is None: break
+            ch, data = item
+            try:
+                self.record_file[ch].write(data)
+            except Exception as e:
+                # Disk full, file closed... the recording is stopped from the GUI thread
+                self.record_error.emit(f"Channel {ch}: {e}")
+                return
+
+    def recording_failed(self, message: str):
+        self.stop_recording()
+        QtWidgets.QMessageBox.critical(self, 'Recording stopped', f'The recording failed and was stopped.\n{message}')
 
     def record_data(self, incoming_data):
         if not self.is_recording: return
 
-        for ch in AVAILABLE_CHANNELS:
-            if self.settings[ch].active:
-                np.array(incoming_data[ch], dtype='int16').tofile(self.record_file[ch])
+        for ch in self._recorded_channels:
+            # Disabled during the recording: no new samples for this channel
+            if not self.settings[ch].active: continue
+            # Copy, the driver buffer is reused for the next chunk. Already int16, no cast needed.
+            self.record_queue.put((ch, incoming_data[ch].tobytes()))
 
     def start_acquisition(self):
         try:
@@ -386,15 +512,22 @@ class MainWindow(QtWidgets.QWidget):
             autoTrigger_ms=False)
 
     def setup_channels(self):
-        for setting in self.settings.values():
-            self.picoscope.set_channel(setting.flag, setting.active, COUPLING.DC, setting.range, setting.offset)
+        self.picoscope.apply_all(analog=[
+            (setting.flag, setting.active, COUPLING.DC, setting.range, setting.offset)
+            for setting in self.settings.values()
+        ])
 
     def setup_acquisition(self):
         """ Set up the data acquisition. """
-        # Set up the data buffers
+        # Set up the data buffers, rows of a single block so that all channels are scaled at once
+        n_channels = len(AVAILABLE_CHANNELS)
+        self._raw_block = np.zeros((n_channels, self.size_one_buffer), dtype=np.int16)
+        self._scaled_block = np.empty((n_channels, self.size_one_buffer), dtype=np.float32)
         self.buffers = {}
-        for ch in AVAILABLE_CHANNELS:
-            self.buffers[ch] = np.zeros(self.size_one_buffer, dtype=np.int16)
+        self._data_chunk = {ch: None for ch in AVAILABLE_CHANNELS}
+        for i, ch in enumerate(AVAILABLE_CHANNELS):
+            # Rows of a C-contiguous block are contiguous views, the driver only needs their address
+            self.buffers[ch] = self._raw_block[i]
             self.picoscope.set_data_buffers(
                 channel=self.settings[ch].flag,
                 buffer_max=self.buffers[ch],
@@ -408,6 +541,13 @@ class MainWindow(QtWidgets.QWidget):
         res = calculate_sample_interval(sample_rate)
         self.sample_interval, self.time_unit = res
 
+        # Poll twice per driver buffer: faster polling only wakes up for nothing
+        self.timer.setInterval(max(5, int(1000 * self.size_one_buffer / sample_rate * 0.5)))
+
+        # Time axis shared by all the channels, only rebuilt when the sampling changes
+        self._dt = self.sample_interval * unit(self.time_unit)
+        self._x_full = np.arange(self.max_buffer_size, dtype=np.float64) * self._dt
+
         time.sleep(1)
         # Start the streaming
         _ = self.picoscope.run_streaming(
@@ -424,12 +564,12 @@ class MainWindow(QtWidgets.QWidget):
 
     def streaming_ready_callback(self,handle, no_of_samples, start_index, overflow, *args):
         """ Callback function for the streaming data collection. """
-        data_chunk = {}                                                                                                                                                                   
-        for ch in AVAILABLE_CHANNELS:
-            if not self.settings[ch].active: continue
+        # The chunk dictionary is reused: consumers must not keep it after the callback returns
+        data_chunk = self._data_chunk
+        for ch in self._active_channels:
             data_chunk[ch] = self.buffers[ch][start_index:(start_index + no_of_samples)]
         
-        self.update_data(data_chunk)
+        self.update_data(self._raw_block[:, start_index:(start_index + no_of_samples)])
 
         self.record_data(data_chunk)
 
@@ -440,6 +580,11 @@ class MainWindow(QtWidgets.QWidget):
     def closeEvent(self, event):
         """ Close the application safely. """
         self.timer.stop()
+        self.draw_timer.stop()
+        # Write any pending configuration
+        if self.save_config_timer.isActive():
+            self.save_config_timer.stop()
+            self.save_config()
         self.picoscope.stop()
         time.sleep(.2)
         self.picoscope.close_unit()
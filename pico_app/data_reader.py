@@ -1,13 +1,13 @@
-import numpy as np
-import matplotlib.pyplot as plt
-
 import numpy as np
 import os
 
+from tools import read_channel_file
+
 def read_recorded_data(directory):
     """
     Reads the recorded data from multiple binary files in the specified directory.
     Returns a dictionary containing headers and data for each channel.
+    The data are read-only memory maps, use np.asarray to load them in memory.
     """
     data_chunk = {}
     headers = {}
@@ -15,38 +15,20 @@ def read_recorded_data(directory):
     # Iterate over all binary files in the given directory
     for filename in os.listdir(directory):
         if filename.endswith('.bin'):
-            filepath = os.path.join(directory, filename)
-            with open(filepath, 'rb') as f:
-                # Read and parse the header
-                header_text = ''
-                while True:
-                    line = f.readline().decode('utf-8')
-                    if line.strip() == '':  # End of header
-                        break
-                    header_text += line
-                
-                # Extract metadata from the header
-                header = {}
-                for line in header_text.splitlines():
-                    if ':' in line:
-                        key, value = line.split(':', 1)
-                        header[key.strip()] = float(value.split()[0].strip())
-                
-                # Extract channel name from filename
-                channel_name = filename.split('_')[-1].replace('.bin', '')
-                
-                # Read the binary data as int16
-                data = np.fromfile(f, dtype=np.int16)
-                
-                # Store the header and data for the channel
-                headers[channel_name] = header
-                data_chunk[channel_name] = data
+            channel_name, header, data = read_channel_file(os.path.join(directory, filename))
+            
+            # Store the header and data for the channel
+            headers[channel_name] = header
+            data_chunk[channel_name] = data
     
     return headers, data_chunk
 
 
 
 if __name__ == '__main__':
+    # Only needed for the plot below, reading the data does not depend on matplotlib
+    import matplotlib.pyplot as plt
+
     header, data = read_recorded_data('pico_app/data/20250225_155503')
     
     scale = header['A']['Scale']
@@ -7,16 +7,23 @@ file for PicoScope 4000 Series oscilloscopes using the ps4000a driver API
 functions.
 """
 from .enums     import *
-from .errors    import CannotOpenPicoSDKError, CannotFindPicoSDKError
-from .constants import pico_tag, make_enum
+from .errors    import CannotOpenPicoSDKError, CannotFindPicoSDKError, InvalidCaptureParameters, FeatureNotSupportedError
+from .constants import pico_tag, PICO_STATUS_LOOKUP, MIN_DWELL_COUNT
 
 import sys
+import time
+import queue
+import threading
+import logging
+from collections import deque
 from ctypes import *
-from functools import wraps
+from functools import partial
 from ctypes.util import find_library
 
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 class TRIGGER_INFO(Structure):
     _pack_ = 1
     _fields_ = [("status", c_uint32),
@@ -27,6 +34,32 @@ class TRIGGER_INFO(Structure):
                 ("reserved0", c_int16),
                 ("timeStampCounter", c_uint64)]
 
+# Same layout as TRIGGER_INFO, to read an array of them as a numpy structured array
+TRIGGER_INFO_DTYPE = np.dtype([("status", np.uint32),
+                               ("segmentIndex", np.uint32),
+                               ("triggerIndex", np.uint32),
+                               ("triggerTime", np.int64),
+                               ("timeUnits", np.int16),
+                               ("reserved0", np.int16),
+                               ("timeStampCounter", np.uint64)])
+assert TRIGGER_INFO_DTYPE.itemsize == sizeof(TRIGGER_INFO)
+
+# Arguments of one 'set_sig_gen_properties_arbitrary' call, in order: one row per step of an AWG sweep plan
+SIG_GEN_PROPERTIES_DTYPE = np.dtype([("start_delta_phase", np.uint32),
+                                     ("stop_delta_phase", np.uint32),
+                                     ("delta_phase_increment", np.uint32),
+                                     ("dwell_count", np.uint32),
+                                     ("sweep_type", np.int32),
+                                     ("shots", np.uint32),
+                                     ("sweeps", np.uint32),
+                                     ("trigger_type", np.int32),
+                                     ("trigger_source", np.int32),
+                                     ("ext_in_threshold", np.int16)])
+
+# C prototypes of the ready callbacks, built once: see block_ready_callback and streaming_ready_callback
+BLOCK_READY_T = CFUNCTYPE(None, c_int16, c_int32, c_void_p)
+STREAMING_READY_T = CFUNCTYPE(None, c_int16, c_int32, c_uint32, c_int16, c_uint32, c_int16, c_int16, c_void_p)
+
 def block_ready_callback(handle, status, p_parameter):
     """ 
     Signature of a ready callback function.
@@ -36,7 +69,8 @@ def block_ready_callback(handle, status, p_parameter):
     data using the 'get_values' function.
     """
     if p_parameter:
-        # Parameter extraction (you can pass any python object to this function)
+        # Parameter extraction (you can pass any python object to this function).
+        # A callback defined on the application side can use 'PS4000A.callback_parameter' instead.
         parameter = cast(p_parameter, POINTER(py_object)).contents.value
     else:
         parameter = None
@@ -81,29 +115,265 @@ def streaming_ready_callback(handle,
         back to the application.
     """
     if p_parameter:
-        # Parameter extraction (you can pass any python object to this function)
+        # Parameter extraction (you can pass any python object to this function).
+        # A callback defined on the application side can use 'PS4000A.callback_parameter' instead.
         parameter = cast(p_parameter, POINTER(py_object)).contents.value
     else:
         parameter = None
 
     return
 
-def check_status(func):
-    @wraps(func)
-    def wrapper(self, *args, **kwargs):
-        result = func(self, *args, **kwargs)
-        if self.status != 0:
-            print(pico_tag(self.status))
-            # You can raise a custom exception or RuntimeError, etc.
-            # raise RuntimeError(pico_tag(self.status))
-        return result
-    return wrapper
+def _uv(volts: float) -> int:
+    """ Volts to the integer microvolts of the driver, rounded half away from zero. """
+    return int(volts * 1_000_000 + (0.5 if volts >= 0 else -0.5))
+
+def check_sample_buffer(buffer: np.ndarray):
+    """ The driver writes raw int16 samples at the buffer address, the array must match that layout. """
+    if buffer.dtype != np.int16 or not buffer.flags['C_CONTIGUOUS']:
+        raise InvalidCaptureParameters("Sample buffers must be C-contiguous int16 arrays, got %s." % buffer.dtype)
+
+def buffer_address(buffer) -> tuple[int, int]:
+    """ 
+    Address and number of int16 samples of a sample buffer. Numpy arrays are read from their array interface, 
+    any other writable buffer (array.array('h'), bytearray, memoryview...) through the buffer protocol.
+    """
+    if isinstance(buffer, np.ndarray):
+        check_sample_buffer(buffer)
+        return buffer.__array_interface__['data'][0], len(buffer)
+    view = memoryview(buffer).cast('B').cast('h')
+    return addressof((c_int16 * len(view)).from_buffer(view)), len(view)
+
+def as_sample_array(buffer) -> np.ndarray:
+    """ Numpy int16 view of a sample buffer accepted by 'buffer_address'. """
+    return buffer if isinstance(buffer, np.ndarray) else np.frombuffer(buffer, dtype=np.int16)
+
+def sig_gen_properties_plan(start_delta_phase,
+                            stop_delta_phase,
+                            delta_phase_increment=0,
+                            dwell_count=MIN_DWELL_COUNT,
+                            sweep_type=SWEEP_TYPE.UP,
+                            shots=0,
+                            sweeps=0,
+                            trigger_type=SIGGEN_TRIG_TYPE.RISING,
+                            trigger_source=SIGGEN_TRIG_SOURCE.NONE,
+                            ext_in_threshold=0) -> np.ndarray:
+    """ 
+    Build an AWG sweep plan, a SIG_GEN_PROPERTIES_DTYPE array with one row per step. Each argument is a 
+    scalar or an array (e.g. the phases from 'sig_gen_frequency_to_phase' for a list of frequencies), 
+    broadcast together, so the whole plan is converted to the driver types once, by numpy.
+    """
+    columns = np.broadcast_arrays(start_delta_phase, stop_delta_phase, delta_phase_increment, dwell_count, 
+                                  sweep_type, shots, sweeps, trigger_type, trigger_source, ext_in_threshold)
+    plan = np.empty(columns[0].size, dtype=SIG_GEN_PROPERTIES_DTYPE)
+    for name, column in zip(SIG_GEN_PROPERTIES_DTYPE.names, columns):
+        plan[name] = column.ravel()
+    return plan
+
+# Signatures of the ps4000a functions: name suffix -> (argtypes, restype).
+# With argtypes declared, ctypes converts plain python ints by itself, so the
+# wrappers do not have to build c_int16(...)/c_uint32(...) objects on every call.
+# Scalar outputs are declared POINTER(T) and always passed as byref(value), never pointer(value),
+# which would build a full pointer object; array outputs are passed as the array itself or its address.
+SIGNATURES = {
+    "EnumerateUnits":   ((POINTER(c_int16), c_char_p, POINTER(c_int16)), c_uint32),
+    "OpenUnit":         ((POINTER(c_int16), c_char_p), c_uint32),
+    "OpenUnitAsync":    ((POINTER(c_int16), c_char_p), c_uint32),
+    "OpenUnitProgress": ((POINTER(c_int16), POINTER(c_int16), POINTER(c_int16)), c_uint32),
+    "CloseUnit":        ((c_int16,), c_uint32),
+    "Stop":             ((c_int16,), c_uint32),
+    "MinimumValue":     ((c_int16, POINTER(c_int16)), c_uint32),
+    "MaximumValue":     ((c_int16, POINTER(c_int16)), c_uint32),
+    "SetChannel":       ((c_int16, c_int32, c_int16, c_int32, c_int32, c_float), c_uint32),
+    "SetSimpleTrigger": ((c_int16, c_int16, c_int32, c_int16, c_int32, c_uint32, c_int16), c_uint32),
+    "GetTimebase2":     ((c_int16, c_uint32, c_int32, POINTER(c_float), POINTER(c_int32), c_uint32), c_uint32),
+    "MemorySegments":   ((c_int16, c_uint32, POINTER(c_int32)), c_uint32),
+    "SetNoOfCaptures":  ((c_int16, c_uint32), c_uint32),
+    "GetNoOfCaptures":  ((c_int16, POINTER(c_uint32)), c_uint32),
+    "RunBlock":         ((c_int16, c_int32, c_int32, c_uint32, POINTER(c_int32), c_uint32, c_void_p, c_void_p), c_uint32),
+    "IsReady":          ((c_int16, POINTER(c_int16)), c_uint32),
+    # Sample buffers are passed as raw addresses (plain ints) of the numpy arrays
+    "SetDataBuffer":    ((c_int16, c_int32, c_void_p, c_int32, c_uint32, c_int32), c_uint32),
+    "SetDataBuffers":   ((c_int16, c_int32, c_void_p, c_void_p, c_int32, c_uint32, c_int32), c_uint32),
+    "GetValues":        ((c_int16, c_uint32, POINTER(c_uint32), c_uint32, c_int32, c_uint32, POINTER(c_int16)), c_uint32),
+    "GetValuesOverlapped": ((c_int16, c_uint32, POINTER(c_uint32), c_uint32, c_int32, c_uint32, POINTER(c_int16)), c_uint32),
+    "GetValuesOverlappedBulk": ((c_int16, c_uint32, POINTER(c_uint32), c_uint32, c_int32, c_uint32, c_uint32, c_void_p), c_uint32),
+    # Overflow flags array by address as well
+    "GetValuesBulk":    ((c_int16, POINTER(c_uint32), c_uint32, c_uint32, c_uint32, c_int32, c_void_p), c_uint32),
+    "GetValuesAsync":   ((c_int16, c_uint32, c_uint32, c_uint32, c_int32, c_uint32, c_void_p, c_void_p), c_uint32),
+    "GetAnalogueOffset": ((c_int16, c_int32, c_int32, POINTER(c_float), POINTER(c_float)), c_uint32),
+    "SetAutoTriggerMicroSeconds": ((c_int16, c_uint64), c_uint32),
+    "GetMaxSegments":   ((c_int16, POINTER(c_uint32)), c_uint32),
+    "GetTriggerInfoBulk": ((c_int16, c_void_p, c_uint32, c_uint32), c_uint32),
+    "GetNoOfProcessedCaptures": ((c_int16, POINTER(c_uint32)), c_uint32),
+    "RunStreaming":     ((c_int16, POINTER(c_uint32), c_int32, c_uint32, c_uint32, c_int16, c_uint32, c_int32, c_uint32), c_uint32),
+    "GetStreamingLatestValues": ((c_int16, STREAMING_READY_T, c_void_p), c_uint32),
+    "NoOfStreamingValues": ((c_int16, POINTER(c_uint32)), c_uint32),
+    "GetUnitInfo":      ((c_int16, c_char_p, c_int16, POINTER(c_int16), c_uint32), c_uint32),
+    "FlashLed":         ((c_int16, c_int16), c_uint32),
+    "IsLedFlashing":    ((c_int16, POINTER(c_int16)), c_uint32),
+    "GetMinimumTimebaseStateless": ((c_int16, c_uint32, POINTER(c_uint32), POINTER(c_double), c_uint32), c_uint32),
+    "NearestSampleIntervalStateless": ((c_int16, c_uint32, c_double, c_uint32, c_uint16, POINTER(c_uint32), POINTER(c_double)), c_uint32),
+    "SetDigitalPort":   ((c_int16, c_int32, c_int16, c_int16), c_uint32),
+    "SetBandwidthFilter": ((c_int16, c_int32, c_int32), c_uint32),
+    "ChangePowerSource": ((c_int16, c_uint32), c_uint32),
+    "PingUnit":         ((c_int16,), c_uint32),
+    "GetMaxDownSampleRatio": ((c_int16, c_uint32, POINTER(c_uint32), c_int32, c_uint32), c_uint32),
+    "SetSigGenArbitrary": ((c_int16, c_int32, c_uint32, c_uint32, c_uint32, c_uint32, c_uint32, c_void_p, c_int32, 
+                            c_int32, c_int32, c_int32, c_uint32, c_uint32, c_int32, c_int32, c_int16), c_uint32),
+    "SetSigGenPropertiesArbitrary": ((c_int16, c_uint32, c_uint32, c_uint32, c_uint32, c_int32, c_uint32, c_uint32, 
+                                      c_int32, c_int32, c_int16), c_uint32),
+    "SigGenSoftwareControl": ((c_int16, c_int16), c_uint32),
+    "SigGenArbitraryMinMaxValues": ((c_int16, POINTER(c_int16), POINTER(c_int16), POINTER(c_uint32), POINTER(c_uint32)), c_uint32),
+    "SigGenFrequencyToPhase": ((c_int16, c_double, c_int32, c_uint32, POINTER(c_uint32)), c_uint32),
+    "SetSigGenBuiltInV2": ((c_int16, c_int32, c_uint32, c_int32, c_double, c_double, c_double, c_double, c_int32, 
+                            c_int32, c_uint32, c_uint32, c_int32, c_int32, c_int16), c_uint32),
+    "SetSigGenPropertiesBuiltIn": ((c_int16, c_double, c_double, c_double, c_double, c_int32, c_uint32, c_uint32, 
+                                    c_int32, c_int32, c_int16), c_uint32),
+}
+
+# Functions resolved on first use without errcheck: their return value is a state, not an error status
+FUNCTION_NAMES = (
+    "CurrentPowerSource",
+)
+
+class _FunctionTable():
+    """ 
+    Driver functions bound on first access by 'bind', then stored as instance attributes so that later 
+    accesses are plain attribute lookups. Functions the application never uses are never resolved.
+    """
+    def __init__(self, bind):
+        self._bind = bind
+
+    def __getattr__(self, suffix):
+        if suffix not in SIGNATURES and suffix not in FUNCTION_NAMES:
+            raise AttributeError(suffix)
+        c_function = self._bind(suffix)
+        setattr(self, suffix, c_function)
+        return c_function
 
 class PS4000A():
+    # Fixed attribute set: no instance dict, attribute access on the hot paths is a slot load
+    __slots__ = (
+        "driver", "_clib", "_fns", "handle", "_c_handle", "status", "min_adc", "max_adc",
+        "_overflow_scratch", "_overflow_buf", "_trig_buf", "_bulk_array", "_bufs",
+        "_serial_buf", "_unit_info_buf", "_scratch_u32", "_scratch_i16", "_sig_gen_limits",
+        "_block_cb", "_block_cb_py", "_streaming_cb", "_streaming_cb_py",
+        "_ring_bufs", "_ring_samples", "_ring_overflow", "_ring_cb", "_inflight", "_completed",
+        "_params", "_param_by_addr",
+        "_stream_chunks", "_pump_stop", "_pump_thread", "_power_cache",
+    )
 
     def __init__(self):
         self.driver = "ps4000a"
         self._clib = self._load()
+        self._fns = self._bind_functions()
+        # Scratch and sample buffers kept across calls, only reallocated when they have to grow
+        self._overflow_scratch = np.empty(0, dtype=np.int16)
+        self._overflow_buf = None
+        self._trig_buf = None
+        self._bulk_array = None
+        self._bufs = {}
+        # Serial numbers in and out of the driver, also kept alive while open_unit_async runs
+        self._serial_buf = create_string_buffer(1024)
+        self._unit_info_buf = create_string_buffer(256)
+        # Outputs of the scalar getters, some polled during captures, cleared before and read back after each call
+        self._scratch_u32 = c_uint32()
+        self._scratch_i16 = c_int16()
+        self._sig_gen_limits = (c_int16(), c_int16(), c_uint32(), c_uint32())
+        # C trampolines of the last ready callbacks, reused while the python callback does not change.
+        # They must stay referenced as long as the driver may call them.
+        self._block_cb = None
+        self._block_cb_py = None
+        self._streaming_cb = None
+        self._streaming_cb_py = None
+        # Callback parameters of the last call of each kind, and the same objects by the address given to the 
+        # driver. Holding them keeps that address valid until the next call of the same kind replaces them.
+        self._params = {}
+        self._param_by_addr = {}
+        # Capture ring, see setup_capture_ring
+        self._ring_bufs = []
+        self._ring_samples = []
+        self._ring_overflow = []
+        self._ring_cb = BLOCK_READY_T(self._on_capture_ready)
+        # Slots submitted and not completed yet, and completions pushed by the driver ready callback
+        self._inflight = set()
+        self._completed = queue.SimpleQueue()
+        # Streaming pump, see start_streaming_pump
+        self._stream_chunks = deque()
+        self._pump_stop = threading.Event()
+        self._pump_thread = None
+        # (handle, time.monotonic() of the reading, power source tag), see current_power_source
+        self._power_cache = (None, 0.0, None)
+
+    def _bind_functions(self) -> _FunctionTable:
+        """ 
+        Table of the driver functions, each resolved once on first use. Those listed in SIGNATURES get their 
+        argtypes and restype set, and their returned status is checked by ctypes itself through errcheck, 
+        no python wrapper is needed.
+        """
+        # restype is c_uint32, so result is already a python int
+        def errcheck(result, func, args):
+            self.status = result
+            if result != 0 and logger.isEnabledFor(logging.WARNING):
+                logger.warning(PICO_STATUS_LOOKUP.get(result, result))
+            return result
+
+        def bind(suffix):
+            c_function = self._resolve(suffix)
+            if c_function is None:
+                return self._missing(suffix)
+            if suffix in SIGNATURES:
+                c_function.argtypes, c_function.restype = SIGNATURES[suffix]
+                c_function.errcheck = errcheck
+            return c_function
+
+        return _FunctionTable(bind)
+
+    def _resolve(self, suffix: str):
+        """ Look up a driver function, None if the installed driver version does not export it. """
+        try:
+            return getattr(self._clib, self.driver + suffix)
+        except AttributeError:
+            return None
+
+    def _missing(self, suffix: str):
+        """ Placeholder of a function missing from the driver, so that it only fails when it is used. """
+        def missing(*args):
+            raise FeatureNotSupportedError("%s%s is not exported by the installed driver." % (self.driver, suffix))
+        return missing
+
+    def _set_parameter(self, kind: str, parameter):
+        """ 
+        Register the callback parameter of a call, replacing the one of the previous call of the same kind, 
+        and return the pointer to give to the driver (None without parameter).
+        """
+        previous = self._params.pop(kind, None)
+        if previous is not None:
+            self._param_by_addr.pop(addressof(previous), None)
+        if parameter is None:
+            return None
+        self._params[kind] = parameter
+        self._param_by_addr[addressof(parameter)] = parameter
+        return byref(parameter)
+
+    def callback_parameter(self, p_parameter):
+        """ 
+        Python value of the parameter pointer received by a ready callback, looked up by address instead of
+        casting the pointer. None if the pointer is null or not the parameter of the last call of its kind.
+        """
+        parameter = self._param_by_addr.get(p_parameter)
+        return None if parameter is None else parameter.value
+
+    def _ensure(self, attr: str, dtype, n: int) -> np.ndarray:
+        """ 
+        Return the first n items of the numpy array stored in 'attr', replaced by a new one only when it has 
+        less than n items. The driver writes directly in these arrays, no copy to numpy is needed afterwards.
+        """
+        buf = getattr(self, attr)
+        if buf is None or len(buf) < n:
+            buf = np.zeros(n, dtype=dtype)
+            setattr(self, attr, buf)
+        return buf[:n]
 
     def _load(self):
         library_path = find_library(self.driver)
@@ -128,79 +398,66 @@ class PS4000A():
         return result
 
     def enumerate_units(self) -> str:
-        c_function = getattr(self._clib, self.driver + "EnumerateUnits")
-        
         count = c_int16()
-        serial = create_string_buffer(1024)
-        serial_lth = c_int16()
+        serial_lth = c_int16(len(self._serial_buf))
 
-        self.status = c_function(
+        self.status = self._fns.EnumerateUnits(
             byref(count),
-            serial,
+            self._serial_buf,
             byref(serial_lth),
             )
         
-        return serial.value.decode("utf-8")
+        return self._serial_buf.value.decode("utf-8")
 
-    @check_status
     def close_unit(self):
         """
         This function shuts down the PicoScope 5000 Series oscilloscope.
         """
-        c_function = getattr(self._clib, self.driver + "CloseUnit")
-        self.status = c_function(c_int16(self.handle))
+        self.status = self._fns.CloseUnit(self.handle)
 
-    @check_status
     def open_unit(self, serial:str=None):
         """
         This function opens a PicoScope 5000A, 5000B or 5000D Series scope attached to the computer. 
         The maximum number of units that can be opened depends on the operating system, 
         the kernel driver and the computer.
         """
-        
-        c_function = getattr(self._clib, self.driver + "OpenUnit")
         handle = c_int16()
-
         if serial:
-            serial = serial.encode("utf-8")
-            serial_c = create_string_buffer(len(serial) + 1)
-            serial_c.value = serial
+            self._serial_buf.value = serial.encode("utf-8")
 
-        self.status = c_function(
+        self.status = self._fns.OpenUnit(
             byref(handle), 
-            serial_c if serial else None, 
+            self._serial_buf if serial else None, 
             )
         
         self.handle = handle.value
+        # Passed as is to the functions without declared signature
+        self._c_handle = handle
 
         if self.handle <= 0:
             if self.handle == -1: print("Scope fails to open !")
             if self.handle ==  0: print("No scope is found !")
             exit()
 
-    @check_status
     def open_unit_async(self, serial:str=None, resolution:RESOLUTION=0):
         """
         This function opens a scope without blocking the calling thread. You can find out when it has finished by
         periodically calling 'cpen_unit_progress' until that function returns a non-zero value.
 
-
+        The ps4000a driver takes no resolution here, 'resolution' is ignored.
         """
-        c_function = getattr(self._clib, self.driver + "OpenUnitAsync")
-        self.handle = c_int16()
-
+        # The driver writes the handle later, during 'open_unit_progress'. 'handle' stays a plain int,
+        # updated from this variable, as the wrappers and the specialized functions expect.
+        self._c_handle = c_int16()
+        self.handle = 0
         if serial:
-            serial = serial.encode("utf-8")
-            serial_c = create_string_buffer(len(serial) + 1)
-            serial_c.value = serial
-
-        self.status = c_function(
-            byref(self.handle),
-            serial_c if serial else None,
-            c_int32(resolution)
+            self._serial_buf.value = serial.encode("utf-8")
+
+        self.status = self._fns.OpenUnitAsync(
+            byref(self._c_handle),
+            self._serial_buf if serial else None,
             )
         
-    @check_status
     def open_unit_progress(self) -> tuple[int, bool]:
         """
         This function checks on the progress of a request made to 'open_unit_async' to open a scope.
@@ -212,46 +469,38 @@ class PS4000A():
                            100% implies that the open operation is complete. 
         * complete: True when the open operation has finished.
         """
-        c_function = getattr(self._clib, self.driver + "OpenUnitProgress")
-        
         progress_percent = c_int16()
         complete = c_int16()
 
-        self.status = c_function(
-            byref(self.handle),
+        self.status = self._fns.OpenUnitProgress(
+            byref(self._c_handle),
             byref(progress_percent),
             byref(complete)
             )
+        self.handle = self._c_handle.value
         
         return progress_percent.value, bool(complete.value)
 
-    @check_status
     def stop(self):
         """
         This function stops the scope device from sampling data
         """
-        c_function = getattr(self._clib, self.driver + "Stop")
-        self.status = c_function(c_int16(self.handle))
+        self.status = self._fns.Stop(self.handle)
 
-    @check_status
     def get_minimum_value(self) -> int:
         """ This function returns a status code and outputs the minimum ADC count value to a parameter. 
         The output value depends on the currently selected resolution. """
-        c_function = getattr(self._clib, self.driver + "MinimumValue")
         self.min_adc = c_int16()
-        self.status = c_function(c_int16(self.handle), byref(self.min_adc))
+        self.status = self._fns.MinimumValue(self.handle, byref(self.min_adc))
         return self.min_adc.value
 
-    @check_status
     def get_maximum_value(self) -> int:
         """ This function returns a status code and outputs the maximum ADC count value to a parameter. 
         The output value depends on the currently selected resolution. """
-        c_function = getattr(self._clib, self.driver + "MaximumValue")
         self.max_adc = c_int16()
-        self.status = c_function(c_int16(self.handle), byref(self.max_adc))
+        self.status = self._fns.MaximumValue(self.handle, byref(self.max_adc))
         return self.max_adc.value
 
-    @check_status
     def set_channel(self, 
                     channel: CHANNEL, 
                     enabled: bool, 
@@ -267,17 +516,15 @@ class PS4000A():
         as obtained from "get_analogue_offset".
 
         """
-        c_function = getattr(self._clib, self.driver + "SetChannel")
-        self.status = c_function(
-            c_int16(self.handle),
-            c_int32(channel),
-            c_int16(1 if enabled else 0),
-            c_int32(coupling),
-            c_int32(channel_range),
-            c_float(analog_offset)
+        self.status = self._fns.SetChannel(
+            self.handle,
+            channel,
+            enabled,
+            coupling,
+            channel_range,
+            analog_offset
         )
 
-    @check_status
     def set_simple_trigger(self, 
                            enable:bool, 
                            source:CHANNEL, 
@@ -308,18 +555,16 @@ class PS4000A():
             For greater precision, call 'set_auto_trigger_microseconds' after calling this function.
 
         """
-        c_function = getattr(self._clib, self.driver + "SetSimpleTrigger")
-        self.status = c_function(
-            c_int16(self.handle), 
-            c_int16(1 if enable else 0), 
+        self.status = self._fns.SetSimpleTrigger(
+            self.handle, 
+            enable, 
             source, 
-            c_int16(threshold_mu), 
+            threshold_mu, 
             direction, 
-            c_int32(delay), 
-            c_int16(autoTrigger_ms)
+            delay, 
+            autoTrigger_ms
         )
     
-    @check_status
     def get_timebase(self, timebase: int, no_samples: int, segment_index: int = 0) -> tuple[float, int]:
         """
         This function calculates the sampling rate and maximum number of samples for a given timebase under the
@@ -342,23 +587,20 @@ class PS4000A():
                 for internal overheads and this may vary depending on the number of segments, 
                 number of channels enabled, and the timebase chosen.
         """
-        c_function = getattr(self._clib, self.driver + "GetTimebase2")
-        
         time_interval_ns = c_float()
         max_samples = c_int32()
 
-        self.status = c_function(
-            c_int16(self.handle),                 
-            c_uint32(timebase),
-            c_int32(no_samples),
+        self.status = self._fns.GetTimebase2(
+            self.handle,
+            timebase,
+            no_samples,
             byref(time_interval_ns),
             byref(max_samples),
-            c_uint32(segment_index)
+            segment_index
         )
 
         return time_interval_ns.value, max_samples.value
 
-    @check_status
     def memory_segments(self, n_segments: int) -> int:
         """
         This function sets the number of memory segments that the scope will use.
@@ -377,19 +619,16 @@ class PS4000A():
                 the number of samples available to each channel is nMaxSamples divided by 2; 
                 for 3 or 4 channels or digital ports divide by 4; and for 5 to 6 channels or digital ports divide by 8.
         """
-        c_function = getattr(self._clib, self.driver + "MemorySegments")
-
         n_max_samples = c_int32()
 
-        self.status = c_function(
-            c_int16(self.handle),            
-            c_uint32(n_segments),
+        self.status = self._fns.MemorySegments(
+            self.handle,
+            n_segments,
             byref(n_max_samples)
         )
 
         return n_max_samples.value
 
-    @check_status
     def set_no_of_captures(self, n_captures: int):
         """ 
         This function sets the number of captures to be collected in one run of rapid block mode. If you do not call
@@ -397,10 +636,8 @@ class PS4000A():
         remains constant unless changed.
         
         n_captures : the number of waveforms to capture in one run."""
-        c_function = getattr(self._clib, self.driver + "SetNoOfCaptures")
-        self.status = c_function(c_int16(self.handle), c_uint32(n_captures))
+        self.status = self._fns.SetNoOfCaptures(self.handle, n_captures)
 
-    @check_status
     def get_no_of_captures(self) -> int:
         """ 
         This function returns the number of captures the device has made in rapid block mode, since you called
@@ -409,14 +646,12 @@ class PS4000A():
         (n_captures) can then be used to iterate through the number of segments using 'get_values', or in
         a single call to 'get_values_bulk', where it is used to calculate the toSegmentIndex parameter."""
 
-        c_function = getattr(self._clib, self.driver + "GetNoOfCaptures")
-        n_captures = c_uint32()
-        self.status = c_function(c_int16(self.handle), byref(n_captures))
-        return n_captures.value
+        self._scratch_u32.value = 0
+        self.status = self._fns.GetNoOfCaptures(self.handle, byref(self._scratch_u32))
+        return self._scratch_u32.value
 
     no_of_captures = property(get_no_of_captures, set_no_of_captures)
 
-    @check_status
     def run_block(self,
                 pre_trigger_samples: int,
                 post_trigger_samples: int,
@@ -453,45 +688,120 @@ class PS4000A():
             This does not include any auto trigger timeout. 
             If this pointer is null, nothing will be written here
         """
-        c_function = getattr(self._clib, self.driver + "RunBlock")
+        # Bound methods are new objects on each access, compare them by equality
+        if ready_callback != self._block_cb_py:
+            self._block_cb = BLOCK_READY_T(ready_callback) if ready_callback else None
+            self._block_cb_py = ready_callback
+        block_ready = self._block_cb
         
-        BlockReady = CFUNCTYPE(None,c_int16,c_int32,c_void_p)
-        block_ready = BlockReady(ready_callback) if ready_callback else None
+        p_parameter = self._set_parameter("block", parameter)
+
+        time_indisposed_ms = c_int32()
+        self.status = self._fns.RunBlock(
+            self.handle,
+            pre_trigger_samples,
+            post_trigger_samples,
+            timebase,
+            byref(time_indisposed_ms),
+            segment_index,
+            block_ready,                    # lpReady (function pointer)
+            p_parameter,                    # pParameter (void pointer)
+        )
         
-        p_parameter = byref(parameter) if parameter is not None else None
+        return time_indisposed_ms.value
 
+    def compile_run_block(self,
+                          pre_trigger_samples: int,
+                          post_trigger_samples: int,
+                          timebase: int,
+                          segment_index: int = 0,
+                          ready_callback = None,
+                          parameter: py_object = None):
+        """
+        Return a 'run_block' specialized for fixed arguments, for acquisition loops repeating the same capture.
+        The arguments, the callback trampoline and the output variable are converted once here; the returned
+        function takes no argument and returns time_indisposed_ms, see 'run_block'.
+        """
+        block_ready = BLOCK_READY_T(ready_callback) if ready_callback else None
+        p_parameter = self._set_parameter("compiled_block", parameter)
         time_indisposed_ms = c_int32()
-        self.status = c_function(
+
+        run = partial(
+            self._fns.RunBlock,
             c_int16(self.handle),
             c_int32(pre_trigger_samples),
             c_int32(post_trigger_samples),
-            c_uint32(timebase),            
+            c_uint32(timebase),
             byref(time_indisposed_ms),
             c_uint32(segment_index),
-            block_ready,                    # lpReady (function pointer)
-            cast(p_parameter, c_void_p),        # pParameter (void pointer)
+            block_ready,
+            p_parameter,
         )
-        
-        return time_indisposed_ms.value
 
-    @check_status
+        def run_block():
+            run()
+            return time_indisposed_ms.value
+        # The trampoline must live as long as the specialized function
+        run_block.block_ready = block_ready
+        return run_block
+
     def is_ready(self) -> bool:
         """
         This function may be used instead of a callback function to receive data from 'run_block'. 
         To use this method, pass a NULL pointer as the 'ready_callback' argument to 'run_block'. 
         You must then poll the driver to see if it has finished collecting the requested samples.
         """
-        c_function = getattr(self._clib, self.driver + "IsReady")
+        self._scratch_i16.value = 0
+        self.status = self._fns.IsReady(self.handle, byref(self._scratch_i16))
+        return bool(self._scratch_i16.value)
+
+    def wait_ready(self, timeout: float = None, poll_interval: float = 0.0) -> bool:
+        """
+        Poll the driver until the block capture started by 'run_block' is ready, 
+        instead of a 'while not is_ready(): time.sleep(...)' loop in the application.
+        ctypes releases the GIL during each IsReady call, and during the optional sleep between polls, 
+        so the other python threads (disk writer, GUI) keep running meanwhile.
+
+        Parameters:
+            - timeout: the maximum waiting time in seconds, None to wait until ready.
+            - poll_interval: the pause in seconds between two polls, 0 to poll continuously.
+
+        Returns:
+            - ready: False if the timeout expired or the driver returned an error before the capture was ready.
+        """
+        is_ready = self._fns.IsReady
+        handle = self.handle
         ready = c_int16()
-        self.status = c_function(c_int16(self.handle), byref(ready))
-        return bool(ready.value)
+        p_ready = byref(ready)
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            if is_ready(handle, p_ready) != 0:
+                return False
+            if ready.value:
+                return True
+            if deadline is not None and time.perf_counter() > deadline:
+                return False
+            if poll_interval:
+                time.sleep(poll_interval)
+
+    def allocate_channel_buffers(self, channel: CHANNEL, length: int) -> np.ndarray:
+        """
+        Return a sample buffer of 'length' samples for the channel. The buffer is kept on the instance and 
+        reused by the next calls, it is only reallocated when a longer buffer is requested.
+        Buffers from here are C-contiguous int16 arrays by construction, they are not checked again.
+        """
+        buffer = self._bufs.get(channel)
+        if buffer is None or buffer.size < length:
+            buffer = np.zeros(length, dtype=np.int16)
+            self._bufs[channel] = buffer
+        return buffer[:length]
 
-    @check_status
     def set_data_buffer(self,
                         channel: CHANNEL,
-                        buffer: np.ndarray,
-                        segment_index: int,
-                        down_sample_ratio_mode: int) -> int:
+                        buffer: np.ndarray = None,
+                        segment_index: int = 0,
+                        down_sample_ratio_mode: int = RATIO_MODE.NONE,
+                        buffer_length: int = None) -> np.ndarray:
         """
         This function tells the driver where to store the data, either unprocessed or downsampled, that will be
         returned after the next call to one of the GetValues functions. The function allows you to specify only a
@@ -500,25 +810,35 @@ class PS4000A():
         Parameters:
             - channel: The channel identifier.
             - buffer: pointer to the buffer. Each sample written to the buffer will be a 16-bit ADC count scaled
-                      according to the selected voltage range
-            - buffer_length: the length of the buffer array. 
+                      according to the selected voltage range. 
+                      A numpy int16 array or any writable int16 buffer, as array.array('h').
+                      If None, the channel buffer from 'allocate_channel_buffers' is used.
             - segment_index: The memory segment number to be used.
             - mode: The downsampling ratio mode (RATIO_MODE). This must correspond to
                         the mode used when retrieving values (e.g. via get_values...()).
+            - buffer_length: the length of the buffer array, only used when buffer is None.
 
+        Returns:
+            - buffer: the buffer registered to the driver.
         """
-        c_function = getattr(self._clib, self.driver + "SetDataBuffer")
-        
-        self.status = c_function(
-            c_int16(self.handle),
-            c_int32(channel),
-            buffer.ctypes.data_as(POINTER(c_int16)),
-            c_int32(len(buffer)),
-            c_uint32(segment_index),
-            c_int32(down_sample_ratio_mode)
+        # The address is a plain int, cheaper to get than a ctypes pointer object
+        if buffer is None:
+            buffer = self.allocate_channel_buffers(channel, buffer_length)
+            ptr, length = buffer.__array_interface__['data'][0], len(buffer)
+        else:
+            ptr, length = buffer_address(buffer)
+            self._bufs[channel] = as_sample_array(buffer)
+
+        self.status = self._fns.SetDataBuffer(
+            self.handle,
+            channel,
+            ptr,
+            length,
+            segment_index,
+            down_sample_ratio_mode
         )
+        return buffer
 
-    @check_status
     def set_data_buffers(self,
                         channel: CHANNEL,
                         buffer_max: np.ndarray,
@@ -546,19 +866,20 @@ class PS4000A():
             - mode: The downsampling ratio mode. This must correspond to the mode used when retrieving values.
 
         """
-        c_function = getattr(self._clib, self.driver + "SetDataBuffers")
+        ptr_max, length = buffer_address(buffer_max) if buffer_max is not None else (None, 0)
+        ptr_min, length = buffer_address(buffer_min) if buffer_min is not None else (None, length)
+        self._bufs[channel] = as_sample_array(buffer_max if buffer_max is not None else buffer_min)
 
-        self.status = c_function(
-            c_int16(self.handle),
-            c_int32(channel),
-            buffer_max.ctypes.data_as(POINTER(c_int16)) if buffer_max is not None else None,
-            buffer_min.ctypes.data_as(POINTER(c_int16)) if buffer_min is not None else None,
-            c_int32(len(buffer_max)),
-            c_uint32(segment_index),
-            c_int32(down_sample_ratio_mode)
+        self.status = self._fns.SetDataBuffers(
+            self.handle,
+            channel,
+            ptr_max,
+            ptr_min,
+            length,
+            segment_index,
+            down_sample_ratio_mode
         )
 
-    @check_status
     def get_values(self, 
                    start_index: int, 
                    n_samples: int,
@@ -590,24 +911,21 @@ class PS4000A():
             - overflow: a set of flags that indicate whether an overvoltage has occurred on any of the channels. 
                 It is a bit field with bit 0 denoting Channel A
         """
-        c_function = getattr(self._clib, self.driver + "GetValues")
-        
         samples_retrieved = c_uint32(n_samples)
         overflow = c_int16()
         
-        self.status = c_function(
-            c_int16(self.handle),
-            c_uint32(start_index),
+        self.status = self._fns.GetValues(
+            self.handle,
+            start_index,
             byref(samples_retrieved),
-            c_uint32(down_sample_ratio),
-            c_int32(down_sample_ratio_mode),
-            c_uint32(segment_index),
+            down_sample_ratio,
+            down_sample_ratio_mode,
+            segment_index,
             byref(overflow)
         )
 
         return samples_retrieved.value, overflow.value
 
-    @check_status
     def get_values_bulk(self, 
                         n_samples: int, 
                         from_segment: int, 
@@ -632,33 +950,79 @@ class PS4000A():
             for the segment numbered from_segment and the last element in the array containing the flags for
             the segment numbered to_segment. Each element in the array is a bit field as described under
             get_values. 
+            The array is a view on a scratch buffer overwritten by the next call, copy it to keep it.
         """
-        
-        c_function = getattr(self._clib, self.driver + "GetValuesBulk")
-        
         no_of_samples = c_uint32(n_samples)
         n_segments = to_segment - from_segment + 1
-        overflow_array = np.zeros(n_segments, dtype=np.int16)# (c_int16 * n_segments)()
+        overflow_array = self._ensure("_overflow_scratch", np.int16, n_segments)
         
-        self.status = c_function(
-            c_int16(self.handle),
+        self.status = self._fns.GetValuesBulk(
+            self.handle,
             byref(no_of_samples),
-            c_uint32(from_segment),
-            c_uint32(to_segment),
-            c_uint32(down_sample_ratio),
-            c_int32(down_sample_ratio_mode),
-            overflow_array.ctypes.data_as(POINTER(c_int16))
+            from_segment,
+            to_segment,
+            down_sample_ratio,
+            down_sample_ratio_mode,
+            overflow_array.__array_interface__['data'][0]
         )
-        return no_of_samples.value, list(overflow_array)
+        return no_of_samples.value, overflow_array
+
+    def run_block_many(self,
+                       pre_trigger_samples: int,
+                       post_trigger_samples: int,
+                       timebase: int,
+                       n_captures: int,
+                       down_sample_ratio: int = 1,
+                       down_sample_ratio_mode: RATIO_MODE = RATIO_MODE.NONE,
+                       timeout: float = None):
+        """
+        Rapid block mode in one call: set the number of captures, run the block, wait until the scope is
+        ready and retrieve the captures of all the segments. The buffers of each segment must have been set
+        with 'set_data_buffer' beforehand. The driver functions are called directly, without going through
+        the individual wrappers.
+
+        Parameters:
+            - timeout: the maximum waiting time for the captures in seconds, None to wait until ready, 
+            see 'wait_ready'.
+
+        Returns:
+            - no_of_samples, overflow: see 'get_values_bulk'. 0 and an empty overflow array if a driver call
+            failed or the timeout expired.
+        """
+        fns = self._fns
+        handle = self.handle
+
+        if fns.SetNoOfCaptures(handle, n_captures) != 0:
+            return 0, self._overflow_scratch[:0]
+        time_indisposed_ms = c_int32()
+        if fns.RunBlock(handle, pre_trigger_samples, post_trigger_samples, timebase, 
+                        byref(time_indisposed_ms), 0, None, None) != 0:
+            return 0, self._overflow_scratch[:0]
+
+        if not self.wait_ready(timeout):
+            return 0, self._overflow_scratch[:0]
+
+        overflow_array = self._ensure("_overflow_scratch", np.int16, n_captures)
+        no_of_samples = c_uint32(pre_trigger_samples + post_trigger_samples)
+        if fns.GetValuesBulk(
+            handle,
+            byref(no_of_samples),
+            0,
+            n_captures - 1,
+            down_sample_ratio,
+            down_sample_ratio_mode,
+            overflow_array.__array_interface__['data'][0]
+        ) != 0:
+            return 0, self._overflow_scratch[:0]
+        return no_of_samples.value, overflow_array
 
-    @check_status
     def get_values_overlapped(self,
                                 start_index: int,
                                 no_of_samples: int,
                                 down_sample_ratio: int,
                                 down_sample_ratio_mode: RATIO_MODE,
                                 segment_index: int
-                                ) -> tuple[int, list]:
+                                ) -> tuple[int, int]:
         """
         This function allows you to make a deferred data-collection request in block mode. The request will be
         executed, and the arguments validated, when you call 'run_block'. The advantage of this function is
@@ -669,33 +1033,30 @@ class PS4000A():
         After calling 'run_block', you can optionally use 'get_values' to request further copies of
         the data. This might be required if you wish to display the data with different data reduction settings.
         """
-
-        c_function = getattr(self._clib, self.driver + "GetValuesOverlapped")
         
         samples_var = c_uint32(no_of_samples)
     
         overflow = c_int16()
         
-        self.handle = c_function(
-            c_int16(self.handle),
-            c_uint32(start_index),
+        self.status = self._fns.GetValuesOverlapped(
+            self.handle,
+            start_index,
             byref(samples_var),
-            c_uint32(down_sample_ratio),
-            c_int32(down_sample_ratio_mode),
-            c_uint32(segment_index),
-            cast(overflow, c_void_p)
+            down_sample_ratio,
+            down_sample_ratio_mode,
+            segment_index,
+            byref(overflow)
         )
         
-        return samples_var.value, list(overflow)
+        return samples_var.value, overflow.value
 
-    @check_status
     def get_values_overlapped_bulk(self,
                                 start_index: int,
                                 no_of_samples: int,
                                 from_segment: int,
                                 to_segment: int,
                                 down_sample_ratio: int,
-                                down_sample_ratio_mode: RATIO_MODE) -> tuple[int, list]:
+                                down_sample_ratio_mode: RATIO_MODE) -> tuple[int, np.ndarray]:
         """
         This function allows you to make a deferred data-collection request in rapid block mode. The request will be
         executed, and the arguments validated, when you call 'run_block'. The advantage of this method is
@@ -711,27 +1072,165 @@ class PS4000A():
             start_index, no_of_samples, down_sample_ratio, down_sample_ratio_mode, see 'get_values'. 
             from_segment, to_segment, * overflow†, see 'get_values_bulk'
         """
-        c_function = getattr(self._clib, self.driver + "GetValuesOverlappedBulk")
-        
         samples_var = c_uint32(no_of_samples)
         
         num_segments = to_segment - from_segment + 1
-        overflow = (c_int16 * num_segments)()
+        # Separate from the get_values_bulk scratch: the driver writes it when the capture ends
+        overflow = self._ensure("_overflow_buf", np.int16, num_segments)
         
-        self.handle = c_function(
-            c_int16(self.handle),
-            c_uint32(start_index),
+        self.status = self._fns.GetValuesOverlappedBulk(
+            self.handle,
+            start_index,
             byref(samples_var),
-            c_uint32(down_sample_ratio),
-            c_int32(down_sample_ratio_mode),
-            c_uint32(from_segment),
-            c_uint32(to_segment),
-            cast(overflow, c_void_p)
+            down_sample_ratio,
+            down_sample_ratio_mode,
+            from_segment,
+            to_segment,
+            overflow.__array_interface__['data'][0]
         )
         
-        return samples_var.value, list(overflow)
+        return samples_var.value, overflow
+
+    def make_overlapped_bulk_getter(self,
+                                    start_index: int,
+                                    no_of_samples: int,
+                                    from_segment: int,
+                                    to_segment: int,
+                                    down_sample_ratio: int,
+                                    down_sample_ratio_mode: RATIO_MODE):
+        """
+        Return a 'get_values_overlapped_bulk' specialized for fixed arguments, for rapid block loops arming the 
+        same transfer before each 'run_block'. The arguments are converted once here and the sample count and
+        overflow flags are owned by the returned function, which takes no argument and returns 
+        (no_of_samples, overflow) as 'get_values_overlapped_bulk'.
+        """
+        get_values = self._fns.GetValuesOverlappedBulk
+        handle = c_int16(self.handle)
+        start = c_uint32(start_index)
+        ratio = c_uint32(down_sample_ratio)
+        mode = c_int32(down_sample_ratio_mode)
+        first = c_uint32(from_segment)
+        last = c_uint32(to_segment)
+        # Written by the driver when the capture ends: they live as long as the getter
+        samples = c_uint32(no_of_samples)
+        p_samples = byref(samples)
+        overflow = np.zeros(to_segment - from_segment + 1, dtype=np.int16)
+        p_overflow = overflow.__array_interface__['data'][0]
+
+        def get_values_overlapped_bulk():
+            samples.value = no_of_samples
+            get_values(handle, start, p_samples, ratio, mode, first, last, p_overflow)
+            return samples.value, overflow
+        return get_values_overlapped_bulk
+
+    def arm_bulk(self, channels: list, n_segments: int, n_samples: int, 
+                 down_sample_ratio_mode: RATIO_MODE = RATIO_MODE.NONE) -> np.ndarray:
+        """
+        Allocate one contiguous int16 array of shape (len(channels), n_segments, n_samples) and register
+        each of its (channel, segment) rows as the driver buffer of that channel and segment. 
+        A single 'get_values_overlapped_bulk' or 'get_values_bulk' then fills the whole array, which the 
+        application processes with vectorized numpy operations, data[i] being all the segments of channels[i].
+        The registration is done once, the array is kept by the instance until the next 'arm_bulk'.
+        """
+        data = np.zeros((len(channels), n_segments, n_samples), dtype=np.int16)
+        base = data.__array_interface__['data'][0]
+        row_bytes = n_samples * data.itemsize
+        set_data_buffer = self._fns.SetDataBuffer
+        for i, ch in enumerate(channels):
+            for segment in range(n_segments):
+                address = base + (i * n_segments + segment) * row_bytes
+                if set_data_buffer(self.handle, ch, address, n_samples, segment, down_sample_ratio_mode) != 0:
+                    break
+        self._bulk_array = data
+        return data
+
+    def setup_capture_ring(self, channels: list, n_samples: int, depth: int = 2) -> list:
+        """
+        Prepare a ring of 'depth' block captures, one per memory segment, each with its own buffer per channel.
+        The buffers are registered to the driver once here, so the captures only need 'submit_capture' and 
+        'reap_capture': the scope fills the next slot while the application processes the previous one.
+
+        Parameters:
+            - channels: the enabled channels.
+            - n_samples: the number of samples of each capture.
+            - depth: the number of slots of the ring.
+
+        Returns:
+            - ring_bufs: for each slot, a dictionary channel -> buffer.
+        """
+        self.memory_segments(depth)
+        self._ring_bufs = [{ch: np.zeros(n_samples, dtype=np.int16) for ch in channels} for _ in range(depth)]
+        # The driver writes the deferred results here when the capture ends, they must outlive the calls
+        self._ring_samples = [c_uint32() for _ in range(depth)]
+        self._ring_overflow = [c_int16() for _ in range(depth)]
+        # Nothing in flight in the new ring, and no completion of a previous ring to reap
+        self._inflight = set()
+        self._completed = queue.SimpleQueue()
+        for slot, bufs in enumerate(self._ring_bufs):
+            for ch, buffer in bufs.items():
+                self._fns.SetDataBuffer(self.handle, ch, buffer.__array_interface__['data'][0], n_samples, slot, RATIO_MODE.NONE)
+        return self._ring_bufs
+
+    def submit_capture(self, slot: int, timebase: int, pre_trigger_samples: int = 0) -> int:
+        """
+        Start the capture of a slot of the ring and return immediately. The data request is armed with 
+        GetValuesOverlapped before 'run_block', so the samples are transferred to the slot buffers without 
+        a later 'get_values'. The completion is queued by the driver callback, collect it with 'reap_capture'.
+        The slot is passed as the callback parameter, so completions are matched to their slot in any order.
+
+        Returns:
+            - time_indisposed_ms: see 'run_block', None if the driver refused the capture ('status' holds
+            the error), nothing is queued for the slot then.
+        """
+        fns = self._fns
+        n_samples = len(next(iter(self._ring_bufs[slot].values())))
+        samples = self._ring_samples[slot]
+        samples.value = n_samples
+        self.status = fns.GetValuesOverlapped(
+            self.handle, 0, byref(samples), 1, RATIO_MODE.NONE, slot, byref(self._ring_overflow[slot])
+        )
+        if self.status != 0:
+            return None
+
+        time_indisposed_ms = c_int32()
+        # The slot is in flight before RunBlock returns: the callback may already run on a driver thread
+        self._inflight.add(slot)
+        self.status = fns.RunBlock(self.handle, pre_trigger_samples, n_samples - pre_trigger_samples, timebase, 
+                                   byref(time_indisposed_ms), slot, self._ring_cb, slot + 1)
+        if self.status != 0:
+            self._inflight.discard(slot)
+            return None
+        return time_indisposed_ms.value
+
+    def _on_capture_ready(self, handle, status, p_parameter):
+        """ Block ready callback of the ring, called from a driver thread: only queue the completion. """
+        # The parameter is slot + 1, so that slot 0 is not a null pointer
+        slot = p_parameter - 1
+        # Queued first: a slot is always either in flight or queued until reaped, for 'reap_capture'.
+        # Nothing here can raise, an exception would be swallowed by ctypes and the completion lost.
+        self._completed.put((slot, status, time.perf_counter()))
+        self._inflight.discard(slot)
+
+    def reap_capture(self, wait: bool = True, timeout: float = None):
+        """
+        Collect the next capture completed since 'submit_capture'. 
+
+        Typical loop: reap slot i, submit slot i+1, then process the buffers of slot i while the scope captures.
+
+        Returns:
+            - (slot, buffers, n_samples, overflow, t_ready) of the completed capture, t_ready being the 
+            time.perf_counter() value when the driver signalled it, or None if no capture completed 
+            ('wait' is False or 'timeout' expired). Without any capture in flight it does not wait.
+        """
+        if wait and not self._inflight and self._completed.empty():
+            return None
+        try:
+            slot, status, t_ready = self._completed.get(block=wait, timeout=timeout)
+        except queue.Empty:
+            return None
+        self.status = status
+        return slot, self._ring_bufs[slot], self._ring_samples[slot].value, self._ring_overflow[slot].value, t_ready
 
-    @check_status
     def get_values_async(self,
                         start_index: int,
                         no_of_samples: int,
@@ -755,25 +1254,19 @@ class PS4000A():
             - parameter: a void pointer that will be passed to the callback function. The data type is determined by
                     the application.
         """
-        c_function = getattr(self._clib, self.driver + "GetValuesAsync")
-        
-        if parameter is None:
-            c_p_parameter = None
-        else:
-            c_p_parameter = cast(parameter, c_void_p)
-        
-        self.status = c_function(
-            c_int16(self.handle),
-            c_uint32(start_index),
-            c_uint32(no_of_samples),
-            c_uint32(down_sample_ratio),
-            c_int32(down_sample_ratio_mode),
-            c_uint32(segment_index),
+        p_parameter = self._set_parameter("async", parameter)
+
+        self.status = self._fns.GetValuesAsync(
+            self.handle,
+            start_index,
+            no_of_samples,
+            down_sample_ratio,
+            down_sample_ratio_mode,
+            segment_index,
             data_ready_callback,
-            c_p_parameter
+            p_parameter
         )
 
-    @check_status
     def get_analogue_offset(self, range_val: RANGE, coupling: COUPLING) -> tuple[float, float]:
         """
         This function is used to get the maximum and minimum allowable analog offset for a specific voltage range.
@@ -781,10 +1274,8 @@ class PS4000A():
         maximum_voltage = c_float()
         minimum_voltage = c_float()
         
-        c_function = getattr(self._clib, self.driver + "GetAnalogueOffset")
-        
-        self.status = c_function(
-            c_int16(self.handle),                    
+        self.status = self._fns.GetAnalogueOffset(
+            self.handle,                    
             range_val,
             coupling,
             byref(maximum_voltage),
@@ -792,7 +1283,6 @@ class PS4000A():
         )
         return maximum_voltage.value, minimum_voltage.value
 
-    @check_status
     def set_auto_trigger_microseconds(self, microseconds: int):
         """
         This function sets up the auto-trigger function, which starts a capture if no trigger event occurs 
@@ -805,28 +1295,20 @@ class PS4000A():
         · In streaming mode the device always starts collecting data as soon as run_streaming is called
         but does not start counting post-trigger samples until it detects a trigger event or auto-trigger timeout.
         """
-        c_function = getattr(self._clib, self.driver + "SetAutoTriggerMicroSeconds")
-        self.status = c_function(
-            c_int16(self.handle),
-            c_uint64(microseconds)
+        self.status = self._fns.SetAutoTriggerMicroSeconds(
+            self.handle,
+            microseconds
         )
 
-    @check_status
     def get_max_segments(self) -> int:
         """
         This function returns the maximum number of segments allowed for the opened device. 
         Refer to 'memory_segments' for specific figures.
         """
-        c_function = getattr(self._clib, self.driver + "GetMaxSegments")
-
-        max_segments = c_uint32()
-        self.status = c_function(
-            c_int16(self.handle),
-            byref(max_segments)
-        )
-        return max_segments.value
+        self._scratch_u32.value = 0
+        self.status = self._fns.GetMaxSegments(self.handle, byref(self._scratch_u32))
+        return self._scratch_u32.value
 
-    @check_status
     def get_trigger_info_bulk(self, from_segment_index, to_segment_index):
         """
         Used to retrieve in formation about the trigger point in one or more segments of captured data, 
@@ -837,28 +1319,23 @@ class PS4000A():
         single segment, set 'from_segment_index' equal to 'to_segment_index'.
         
         Returns:
-            trigger_info: a pointer to one or more TRIGGER_INFO objects. When collecting details for a single segment, 
-            this parameter should be a pointer to a single object. When collecting details for more than
-            one segment the parameter should be a pointer to an array of objects, of length greater than or equal to the
-            number of TRIGGER_INFO elements requested.
+            trigger_info: a numpy structured array (TRIGGER_INFO_DTYPE) with one TRIGGER_INFO record per segment,
+            viewing the memory written by the driver. Fields are read as trigger_info["triggerTime"].
+            The memory is reused by the next call, copy the array to keep it.
 
         """
-
-        c_function = getattr(self._clib, self.driver + "GetTriggerInfoBulk")
-
-        # Create array of structures
+        # Structured array written in place by the driver
         n = to_segment_index - from_segment_index + 1
-        trigger_info_array = (TRIGGER_INFO * n)()  
+        trigger_info = self._ensure("_trig_buf", TRIGGER_INFO_DTYPE, n)
 
-        self.status = c_function(
-            c_int16(self.handle),
-            byref(trigger_info_array),
-            c_uint32(from_segment_index),
-            c_uint32(to_segment_index),
+        self.status = self._fns.GetTriggerInfoBulk(
+            self.handle,
+            trigger_info.__array_interface__['data'][0],
+            from_segment_index,
+            to_segment_index,
         )
-        return list(trigger_info_array) 
+        return trigger_info
 
-    @check_status
     def get_no_of_processed_captures(self) -> int:
         """
         This function gets the number of captures collected and processed in one run of rapid block mode. It
@@ -882,12 +1359,10 @@ class PS4000A():
         Returns:
         n_processed_captures : the number of available captures that has been collected from calling 'run_block'. 
         """
-        c_function = getattr(self._clib, self.driver + "GetNoOfProcessedCaptures")
-        n_processed_captures = c_uint32()
-        self.status = c_function(c_int16(self.handle), byref(n_processed_captures))
-        return n_processed_captures.value
+        self._scratch_u32.value = 0
+        self.status = self._fns.GetNoOfProcessedCaptures(self.handle, byref(self._scratch_u32))
+        return self._scratch_u32.value
 
-    @check_status
     def run_streaming(self,
                     sample_interval: int,
                     sample_interval_time_units: TIME_UNITS,
@@ -926,25 +1401,22 @@ class PS4000A():
         Returns:
             - effective_sample_interval: the actual time interval used.
         """
-        c_function = getattr(self._clib, self.driver + "RunStreaming")
-        
         effective_sample_interval = c_uint32(sample_interval)
 
-        self.status = c_function(
-            c_int16(self.handle),
+        self.status = self._fns.RunStreaming(
+            self.handle,
             byref(effective_sample_interval),
-            c_int32(sample_interval_time_units),
-            c_uint32(max_pre_trigger_samples),
-            c_uint32(max_post_trigger_samples),
-            c_int16(1 if auto_stop else 0),
-            c_uint32(down_sample_ratio),
-            c_int32(down_sample_ratio_mode),
-            c_uint32(overview_buffer_size)
+            sample_interval_time_units,
+            max_pre_trigger_samples,
+            max_post_trigger_samples,
+            auto_stop,
+            down_sample_ratio,
+            down_sample_ratio_mode,
+            overview_buffer_size
         )
         
         return effective_sample_interval.value
 
-    @check_status
     def get_streaming_latest_values(self, 
                                     streaming_ready_callback, 
                                     args : py_object = None):
@@ -963,40 +1435,70 @@ class PS4000A():
             parameter: The callback function may optionally use this to return information to the application.
         
         """
-        c_function = getattr(self._clib, self.driver + "GetStreamingLatestValues")
-        
-        StreamingReady = CFUNCTYPE(None,
-                                    c_int16,
-                                    c_int32,
-                                    c_uint32,
-                                    c_int16,
-                                    c_uint32,
-                                    c_int16,
-                                    c_int16,
-                                    c_void_p)
-        
-        streaming_ready = StreamingReady(streaming_ready_callback) if streaming_ready_callback else None
-
-        p_parameter = byref(args) if args is not None else None
-
-        self.status = c_function(
-            c_int16(self.handle),
-            streaming_ready,
-            cast(p_parameter, c_void_p)
-        )
+        if streaming_ready_callback != self._streaming_cb_py:
+            self._streaming_cb = STREAMING_READY_T(streaming_ready_callback) if streaming_ready_callback else None
+            self._streaming_cb_py = streaming_ready_callback
+        streaming_ready = self._streaming_cb
+
+        p_parameter = self._set_parameter("streaming", args)
+
+        self.status = self._fns.GetStreamingLatestValues(self.handle, streaming_ready, p_parameter)
+
+    def start_streaming_pump(self, interval: float = 0.001, maxlen: int = 1024):
+        """
+        Call 'get_streaming_latest_values' from a background thread every 'interval' seconds, instead of
+        polling it from the application. Each time the driver returns new samples, a copy of them is queued as
+        ({channel: samples}, overflow) for every channel with a registered buffer; the application collects
+        them with 'pop_streaming_chunks' at its own rate. 
+        The oldest chunks are dropped when more than 'maxlen' are waiting.
+        'run_streaming' must have been called beforehand.
+        """
+        self.stop_streaming_pump()
+        self._stream_chunks = deque(maxlen=maxlen)
+        self._pump_stop.clear()
+        self._pump_thread = threading.Thread(target=self._streaming_pump, args=(interval,), daemon=True)
+        self._pump_thread.start()
+
+    def stop_streaming_pump(self):
+        """ Stop the thread started by 'start_streaming_pump'. The queued chunks stay available. """
+        if self._pump_thread is None:
+            return
+        self._pump_stop.set()
+        self._pump_thread.join()
+        self._pump_thread = None
+
+    def pop_streaming_chunks(self) -> list:
+        """ Return and remove the chunks queued by the streaming pump, oldest first. """
+        chunks = self._stream_chunks
+        return [chunks.popleft() for _ in range(len(chunks))]
+
+    def _streaming_pump(self, interval: float):
+        """ Thread of the streaming pump, the driver calls back on this thread. """
+        # Own trampoline, kept alive by this frame for the whole loop
+        streaming_ready = STREAMING_READY_T(self._on_streaming_ready)
+        get_latest_values = self._fns.GetStreamingLatestValues
+        handle = self.handle
+        while not self._pump_stop.is_set():
+            get_latest_values(handle, streaming_ready, None)
+            self._pump_stop.wait(interval)
+
+    def _on_streaming_ready(self, handle, no_of_samples, start_index, overflow, trigger_at, triggered, auto_stop, p_parameter):
+        """ Streaming ready callback of the pump: copy the new samples out of the driver buffers and queue them. """
+        if not no_of_samples:
+            return
+        end = start_index + no_of_samples
+        chunk = {ch: buffer[start_index:end].copy() for ch, buffer in self._bufs.items()}
+        self._stream_chunks.append((chunk, overflow))
 
-    @check_status
     def no_of_streaming_values(self) -> int:
         """ 
         This function returns the number of samples available after data collection in streaming mode. 
         Call it after calling 'stop'
         """
-        c_function = getattr(self._clib, self.driver + "NoOfStreamingValues")
-        no_of_values = c_uint32()
-        self.status = c_function(c_int16(self.handle), byref(no_of_values))
-        return no_of_values.value
+        self._scratch_u32.value = 0
+        self.status = self._fns.NoOfStreamingValues(self.handle, byref(self._scratch_u32))
+        return self._scratch_u32.value
 
-    @check_status
     def get_unit_info(self, 
                       info:PICO_INFO, 
                       string_length=256) -> str:
@@ -1012,25 +1514,23 @@ class PS4000A():
         Returns:
             info_string: the unit information string selected specified by the info argument.
         """
-        c_function = getattr(self._clib, self.driver + "GetUnitInfo")
-
-        string = create_string_buffer(string_length)
+        string = self._unit_info_buf if string_length <= len(self._unit_info_buf) else create_string_buffer(string_length)
         
         required_size = c_int16(0)
         
-        self.status = c_function(
-            c_int16(self.handle),
-            byref(string),
-            c_int16(string_length),
+        self.status = self._fns.GetUnitInfo(
+            self.handle,
+            string,
+            string_length,
             byref(required_size),
-            c_uint32(info)
+            info
         )
 
-        info_string = string.value.decode("utf-8")
+        # The string ends at the first null character, whether required_size counts it or not
+        info_string = string.raw[:string_length].split(b'\0', 1)[0].decode("utf-8", "replace")
         
         return info_string #, required_size.value
 
-    @check_status
     def flash_led(self, start:int):
         """
         This function flashes the LED on the front of the scope without blocking the calling thread. 
@@ -1044,21 +1544,14 @@ class PS4000A():
         > 0 : flash the LED 'start' times. 
         If the LED is already flashing on entry to this function, the flash count will be reset to start.
         """
-        c_function = getattr(self._clib, self.driver + "FlashLed")
-        self.status = c_function(c_int16(self.handle), c_int16(start))
+        self.status = self._fns.FlashLed(self.handle, start)
     
-    @check_status
     def is_led_flashing(self) -> bool:
         """ This function reads the status of the front-panel LED. """
-        c_function = getattr(self._clib, self.driver + "IsLedFlashing")
-        status = c_int16()
-        self.status = c_function(
-            c_int16(self.handle), 
-            byref(status)
-            )
-        return bool(status.value)
+        self._scratch_i16.value = 0
+        self.status = self._fns.IsLedFlashing(self.handle, byref(self._scratch_i16))
+        return bool(self._scratch_i16.value)
 
-    @check_status
     def get_minimum_timebase_stateless(self,
                                        enabled_channel_or_port_flags,
                                        resolution: RESOLUTION
@@ -1076,22 +1569,19 @@ class PS4000A():
         - timebase: the shortest timebase available. 
         - time_interval: the sampling interval, in seconds, corresponding to the stated timebase. 
         """
-        c_function = getattr(self._clib, self.driver + "GetMinimumTimebaseStateless")
-
         timebase = c_uint32()
         time_interval = c_double()
 
-        self.status = c_function(
-            c_int16(self.handle), 
-            c_uint32(enabled_channel_or_port_flags),
+        self.status = self._fns.GetMinimumTimebaseStateless(
+            self.handle, 
+            enabled_channel_or_port_flags,
             byref(timebase),
             byref(time_interval),
-            c_uint32(resolution)
+            resolution
             )
 
         return timebase.value, time_interval.value
 
-    @check_status
     def nearest_sample_interval_stateless(self,
                                        enabled_channel_or_port_flags,
                                        time_interval_requested: float,
@@ -1103,17 +1593,15 @@ class PS4000A():
         device configuration. It does not change the configuration of the device.
 
         """
-        c_function = getattr(self._clib, self.driver + "NearestSampleIntervalStateless")
-
         time_interval_available = c_double()
         timebase = c_uint32()
 
-        self.status = c_function(
-            c_int16(self.handle), 
-            c_uint32(enabled_channel_or_port_flags),
-            c_double(time_interval_requested),
-            c_uint32(resolution),
-            c_uint16(1 if use_Ets else 0),
+        self.status = self._fns.NearestSampleIntervalStateless(
+            self.handle, 
+            enabled_channel_or_port_flags,
+            time_interval_requested,
+            resolution,
+            use_Ets,
             byref(timebase),
             byref(time_interval_available),
             )
@@ -1121,7 +1609,6 @@ class PS4000A():
         return time_interval_available.value, timebase.value
 
 
-    @check_status
     def set_digital_port(self, port: CHANNEL, enabled:bool, logic_level: int):
         """
         This function enables or disables a digital port and sets the logic threshold.
@@ -1136,16 +1623,13 @@ class PS4000A():
         - logiclevel, the threshold voltage used to distinguish the 0 and 1 states. 
                 Range: -32767 (-5V) to 32767 (+5V). 
         """
-        c_function = getattr(self._clib, self.driver + "SetDigitalPort")
-        
-        self.status = c_function(
-            c_int16(self.handle), 
-            c_int32(port),
-            c_int16(1 if enabled else 0),
-            c_int16(logic_level)
+        self.status = self._fns.SetDigitalPort(
+            self.handle, 
+            port,
+            enabled,
+            logic_level
             )
         
-    @check_status
     def set_bandwidth_filter(self, channel: CHANNEL, bandwidth: BANDWIDTH_LIMITER):
         """
         This function controls the hardware bandwidth limiter fitted to each analog input channel. 
@@ -1154,15 +1638,38 @@ class PS4000A():
         - channel, the channel to be configured (analog channel A, B, C or D only)
         - bandwidth, the required bandwidth (full or limited to 20 MHz). 
         """
-        c_function = getattr(self._clib, self.driver + "SetBandwidthFilter")
-        
-        self.status = c_function(
-            c_int16(self.handle), 
-            c_int32(channel),
-            c_int32(bandwidth),
+        self.status = self._fns.SetBandwidthFilter(
+            self.handle, 
+            channel,
+            bandwidth,
             )
         
-    @check_status
+    def apply_all(self, analog=(), digital=(), bandwidths=()):
+        """
+        Apply a whole configuration in one call, before arming a capture: the driver functions are called 
+        back to back, without going through the individual wrappers.
+
+        Parameters:
+            - analog: (channel, enabled, coupling, channel_range, analog_offset) tuples, see 'set_channel'.
+            - digital: (port, enabled, logic_level) tuples, see 'set_digital_port'.
+            - bandwidths: (channel, bandwidth) tuples, see 'set_bandwidth_filter'.
+
+        Returns:
+            - ok: False if the driver rejected one of the settings, the following ones are not applied.
+        """
+        fns = self._fns
+        handle = self.handle
+        for channel, enabled, coupling, channel_range, analog_offset in analog:
+            if fns.SetChannel(handle, channel, enabled, coupling, channel_range, analog_offset) != 0:
+                return False
+        for port, enabled, logic_level in digital:
+            if fns.SetDigitalPort(handle, port, enabled, logic_level) != 0:
+                return False
+        for channel, bandwidth in bandwidths:
+            if fns.SetBandwidthFilter(handle, channel, bandwidth) != 0:
+                return False
+        return True
+
     def change_power_source(self, power_state:int):
         """
         This function selects the power supply mode. 
@@ -1181,11 +1688,10 @@ class PS4000A():
                 PICO_USB3_0_DEVICE_NON_USB3_0_PORT - for 2-channel 5000D and 5000D MSO devices
         hint: use PICO_STATUS dictionary in constants.py
         """
-        c_function = getattr(self._clib, self.driver + "ChangePowerSource")
-        
-        self.status = c_function(
-            c_int16(self.handle),
-            c_uint32(power_state)
+        self._power_cache = (None, 0.0, None)
+        self.status = self._fns.ChangePowerSource(
+            self.handle,
+            power_state
         )
 
     def current_power_source(self):
@@ -1198,15 +1704,20 @@ class PS4000A():
         PICO_POWER_SUPPLY_NOT_CONNECTED - device is powered by the USB cable. 
         PICO_USB3_0_DEVICE_NON_USB3_0_PORT - a 2-channel 5000D or 5000D MSO model is connected to a USB 2.0 port. 
         PICO_OK - the device has two channels and PICO_USB3_0_DEVICE_NON_USB3_0_PORT does not apply.
-        """
 
-        c_function = getattr(self._clib, self.driver + "CurrentPowerSource")
-        return pico_tag(c_function(c_int16(self.handle)))
+        The state is read from the device at most every 250 ms, and again after 'change_power_source' or when the handle
+        changes.
+        """
+        handle, timestamp, tag = self._power_cache
+        now = time.monotonic()
+        if tag is None or handle != self.handle or now - timestamp > 0.25:
+            tag = pico_tag(self._fns.CurrentPowerSource(self.handle))
+            self._power_cache = (self.handle, now, tag)
+        return tag
 
     power_source = property(current_power_source, change_power_source)
 
     ##################### AWG ###########################
-    @check_status
     def set_sig_gen_arbitrary(self,
                             offset_voltage: float,
                             pk_to_pk: float,
@@ -1257,7 +1768,8 @@ class PS4000A():
             the time, in 50 ns steps, between successive additions of delta_phase_increment to the delta phase accumulator. 
             This determines the rate at which the generator sweeps the output frequency. Minimum value: MIN_DWELL_COUNT
         arbitrary_waveform:
-            a buffer that holds the waveform pattern as a set of samples equally spaced in time. 
+            a buffer that holds the waveform pattern as a set of samples equally spaced in time, 
+            any int16 buffer accepted by 'buffer_address' (numpy array, ctypes array, array.array('h')...). 
             If pk_to_pk is set to its maximum (4V) and offset_voltage is set to 0, the output range will be [-2V,+2 V]. 
             Obtain the maximum and minimum allowed sample values by calling 'sig_gen_arbitrary_min_max_values'. 
         arbitrary_waveform_size (int):
@@ -1287,32 +1799,67 @@ class PS4000A():
         ext_in_threshold (int):
             used to set trigger level for external trigger.
         """
+        self.set_sig_gen_arbitrary_uv(
+            _uv(offset_voltage),
+            _uv(pk_to_pk),
+            start_delta_phase,
+            stop_delta_phase,
+            delta_phase_increment,
+            dwell_count,
+            arbitrary_waveform,
+            arbitrary_waveform_size,
+            sweep_type,
+            operation,
+            index_mode,
+            shots,
+            sweeps,
+            trigger_type,
+            trigger_source,
+            ext_in_threshold
+        )
 
-        c_function = getattr(self._clib, self.driver + "SetSigGenArbitrary")
-
-
-
-        self.status = c_function(
-            c_int16(self.handle),
-            c_int32(int(round(offset_voltage*1e6))),
-            c_uint32(int(round(pk_to_pk*1e6))),
-            c_uint32(start_delta_phase),
-            c_uint32(stop_delta_phase),
-            c_uint32(delta_phase_increment),
-            c_uint32(dwell_count),
-            cast(arbitrary_waveform, c_void_p),
-            c_int32(arbitrary_waveform_size),
-            c_int32(sweep_type),
-            c_int32(operation),
-            c_int32(index_mode),
-            c_uint32(shots),
-            c_uint32(sweeps),
-            c_int32(trigger_type),
-            c_int32(trigger_source),
-            c_int16(ext_in_threshold)
+    def set_sig_gen_arbitrary_uv(self,
+                            offset_uv: int,
+                            pk_to_pk_uv: int,
+                            start_delta_phase: int,
+                            stop_delta_phase: int,
+                            delta_phase_increment: int,
+                            dwell_count: int,
+                            arbitrary_waveform,
+                            arbitrary_waveform_size: int,
+                            sweep_type: SWEEP_TYPE,
+                            operation: EXTRA_OPERATIONS,
+                            index_mode: INDEX_MODE,
+                            shots: int,
+                            sweeps: int,
+                            trigger_type: SIGGEN_TRIG_TYPE,
+                            trigger_source: SIGGEN_TRIG_SOURCE,
+                            ext_in_threshold: int) -> int:
+        """
+        'set_sig_gen_arbitrary' with the offset and peak-to-peak voltages given in microvolts, the unit of 
+        the driver, for loops reprogramming the generator without converting from volts on every call.
+        """
+        waveform_address, _ = buffer_address(arbitrary_waveform)
+        self.status = self._fns.SetSigGenArbitrary(
+            self.handle,
+            offset_uv,
+            pk_to_pk_uv,
+            start_delta_phase,
+            stop_delta_phase,
+            delta_phase_increment,
+            dwell_count,
+            waveform_address,
+            arbitrary_waveform_size,
+            sweep_type,
+            operation,
+            index_mode,
+            shots,
+            sweeps,
+            trigger_type,
+            trigger_source,
+            ext_in_threshold
         )
     
-    @check_status
     def set_sig_gen_properties_arbitrary(self,
                             start_delta_phase: int,
                             stop_delta_phase: int,
@@ -1329,61 +1876,65 @@ class PS4000A():
         oscilloscope is waiting for a trigger. see 'set_sig_gen_arbitrary'.
         """
 
-        c_function = getattr(self._clib, self.driver + "SetSigGenPropertiesArbitrary")
-
-        self.status = c_function(
-            c_int16(self.handle),
-            c_uint32(start_delta_phase),
-            c_uint32(stop_delta_phase),
-            c_uint32(delta_phase_increment),
-            c_uint32(dwell_count),
-            c_int32(sweep_type),
-            c_uint32(shots),
-            c_uint32(sweeps),
-            c_int32(trigger_type),
-            c_int32(trigger_source),
-            c_int16(ext_in_threshold)
+        self.status = self._fns.SetSigGenPropertiesArbitrary(
+            self.handle,
+            start_delta_phase,
+            stop_delta_phase,
+            delta_phase_increment,
+            dwell_count,
+            sweep_type,
+            shots,
+            sweeps,
+            trigger_type,
+            trigger_source,
+            ext_in_threshold
         )
 
-    @check_status
+    def set_sig_gen_properties_arbitrary_many(self, plan: np.ndarray, interval: float = 0.0) -> int:
+        """
+        Apply the steps of an AWG sweep plan (see 'sig_gen_properties_plan') one after the other, 
+        with 'set_sig_gen_properties_arbitrary'. The plan rows are converted to python ints once, 
+        the loop only calls the driver function.
+
+        Parameters:
+            - plan: a SIG_GEN_PROPERTIES_DTYPE array, one row per step.
+            - interval: the pause in seconds after each step, 0 to apply the steps back to back.
+
+        Returns:
+            - the number of steps applied, less than len(plan) if the driver returned an error.
+        """
+        if plan.dtype != SIG_GEN_PROPERTIES_DTYPE:
+            raise InvalidCaptureParameters("AWG sweep plans must be SIG_GEN_PROPERTIES_DTYPE arrays, got %s." % plan.dtype)
+        set_properties = self._fns.SetSigGenPropertiesArbitrary
+        handle = self.handle
+        for applied, step in enumerate(plan.tolist()):
+            if set_properties(handle, *step) != 0:
+                return applied
+            if interval:
+                time.sleep(interval)
+        return len(plan)
+
     def sig_gen_software_control(self, state:bool):
         """ 
         This function causes a trigger event, or starts and stops gating, for the signal generator.
         See API programmers guide for more details.
         """
-        c_function = getattr(self._clib, self.driver + "SigGenSoftwareControl")
-        self.status = c_function(
-            c_int16(self.handle),
-            c_int16(1 if state else 0)
+        self.status = self._fns.SigGenSoftwareControl(
+            self.handle,
+            state
         ) 
 
-    @check_status
     def sig_gen_arbitrary_min_max_values(self) -> tuple[int,int,int,int]:
         """ 
         This function returns the range of possible sample values and waveform buffer sizes that can 
         be supplied to 'set_sig_gen_arbitrary' for setting up the arbitrary waveform generator (AWG). 
         """
-        c_function = getattr(self._clib, self.driver + "SigGenArbitraryMinMaxValues")
-
-        min_arbitrary_waveform_value = c_int16()
-        max_arbitrary_waveform_value = c_int16()
-        min_arbitrary_waveform_size = c_uint32()
-        max_arbitrary_waveform_size = c_uint32()
+        limits = self._sig_gen_limits
+        for limit in limits:
+            limit.value = 0
+        self.status = self._fns.SigGenArbitraryMinMaxValues(self.handle, *map(byref, limits))
+        return tuple(limit.value for limit in limits)
 
-        self.status = c_function(
-            c_int16(self.handle),
-            byref(min_arbitrary_waveform_value),
-            byref(max_arbitrary_waveform_value),
-            byref(min_arbitrary_waveform_size),
-            byref(max_arbitrary_waveform_size),
-        )
-        return (
-            min_arbitrary_waveform_value.value,
-            max_arbitrary_waveform_value.value, 
-            min_arbitrary_waveform_size.value,
-            max_arbitrary_waveform_size.value)
-
-    @check_status
     def sig_gen_frequency_to_phase(self, 
                                    frequency:float, 
                                    index_mode: INDEX_MODE, 
@@ -1394,18 +1945,16 @@ class PS4000A():
         The phase count can then be used as one of the deltaPhase arguments for set_sig_gen_arbitrary
         or set_sig_gen_properties_arbitrary.
         """
-        c_function = getattr(self._clib, self.driver +"SigGenFrequencyToPhase")
-        phase = c_uint32()
-        self.status = c_function(
-            c_int16(self.handle),
-            c_double(frequency),
-            c_int32(index_mode),
-            c_uint32(buffer_length),
-            byref(phase)
+        self._scratch_u32.value = 0
+        self.status = self._fns.SigGenFrequencyToPhase(
+            self.handle,
+            frequency,
+            index_mode,
+            buffer_length,
+            byref(self._scratch_u32)
         )
-        return phase.value
+        return self._scratch_u32.value
 
-    @check_status
     def set_sig_gen_built_in(self,
                             offset_voltage: float,
                             pk_to_pk: float,
@@ -1434,27 +1983,24 @@ class PS4000A():
 
         Other arguments: see 'set_sig_gen_arbitrary'.
         """
-        c_function = getattr(self._clib, self.driver +"SetSigGenBuiltInV2")
-
-        self.status = c_function(
-            c_int16(self.handle),
-            c_int32(int(round(offset_voltage*1e6))),
-            c_uint32(int(round(pk_to_pk*1e6))),
-            c_int32(wave_type),
-            c_double(start_frequency),
-            c_double(stop_frequency),
-            c_double(increment),
-            c_double(dwell_time),
-            c_int32(sweep_type),
-            c_int32(operation),
-            c_uint32(shots),
-            c_uint32(sweeps),
-            c_int32(trigger_type),
-            c_int32(trigger_source),
-            c_int16(ext_in_threshold)
+        self.status = self._fns.SetSigGenBuiltInV2(
+            self.handle,
+            _uv(offset_voltage),
+            _uv(pk_to_pk),
+            wave_type,
+            start_frequency,
+            stop_frequency,
+            increment,
+            dwell_time,
+            sweep_type,
+            operation,
+            shots,
+            sweeps,
+            trigger_type,
+            trigger_source,
+            ext_in_threshold
         )
 
-    @check_status
     def set_sig_gen_properties_built_in(self,
                             start_frequency: float,
                             stop_frequency: float,
@@ -1472,32 +2018,27 @@ class PS4000A():
         Values can be changed while the oscilloscope is waiting for a trigger.
         Arguments: see 'set_sig_gen_built_in'
         """
-        c_function = getattr(self._clib, self.driver + "SetSigGenPropertiesBuiltIn")
-
-        self.status = c_function(
-            c_int16(self.handle),
-            c_double(start_frequency),
-            c_double(stop_frequency),
-            c_double(increment),
-            c_double(dwell_time),
-            c_int32(sweep_type),
-            c_uint32(shots),
-            c_uint32(sweeps),
-            c_int32(trigger_type),
-            c_int32(trigger_source),
-            c_int16(ext_in_threshold)
+        self.status = self._fns.SetSigGenPropertiesBuiltIn(
+            self.handle,
+            start_frequency,
+            stop_frequency,
+            increment,
+            dwell_time,
+            sweep_type,
+            shots,
+            sweeps,
+            trigger_type,
+            trigger_source,
+            ext_in_threshold
         )
     
-    @check_status
     def ping_unit(self):
         """
         This function can be used to check that the already opened device is still 
         connected to the USB port and communication is successful.
         """
-        c_function = getattr(self._clib, self.driver + "PingUnit")
-        self.status = c_function(c_int16(self.handle),)
+        self.status = self._fns.PingUnit(self.handle,)
 
-    @check_status
     def get_max_down_sample_ratio(self,
                                   no_of_unaggreated_samples:int,
                                   down_sample_ratio_mode: RATIO_MODE,
@@ -1506,19 +2047,12 @@ class PS4000A():
         This function returns the maximum downsampling ratio that can be used for 
         a given number of samples in a given downsampling mode.
         """
-        c_function = getattr(self._clib, self.driver + "GetMaxDownSampleRatio")
-        
-        max_down_sample_ratio = c_uint32()
-        self.status = c_function(
-            c_int16(self.handle),
-            c_uint32(no_of_unaggreated_samples),
-            byref(max_down_sample_ratio),
-            c_int32(down_sample_ratio_mode),
-            c_uint32(segment_index)
+        self._scratch_u32.value = 0
+        self.status = self._fns.GetMaxDownSampleRatio(
+            self.handle,
+            no_of_unaggreated_samples,
+            byref(self._scratch_u32),
+            down_sample_ratio_mode,
+            segment_index
             )
-        return max_down_sample_ratio.value
-
-
-    def make_symbol(self, *args):
-        #print(args[1][7:], " is not implemented")
-        return
+        return self._scratch_u32.value
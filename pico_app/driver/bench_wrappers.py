@@ -0,0 +1,62 @@
+"""
+Per-call cost of the PS4000A wrappers, without a device, in the spirit of 'perf bench syscall'.
+
+Every driver function is bound to the C library 'labs', which returns at once and returns 0 (PICO_OK)
+for the handle 0 used here, so the timings are the python + ctypes overhead of each wrapper on top of
+a null C call. Run from the pico_app directory:
+
+    python -m driver.bench_wrappers [loops]
+
+NullPS4000A is also the scope of the hardware-free tests of the wrappers.
+"""
+import sys
+import timeit
+from ctypes import CDLL, c_long
+from ctypes.util import find_library
+
+from .PS4824A import PS4000A
+from .enums import CHANNEL, INDEX_MODE, RATIO_MODE, SWEEP_TYPE, SIGGEN_TRIG_TYPE, SIGGEN_TRIG_SOURCE
+
+
+class NullPS4000A(PS4000A):
+    """ PS4000A with every driver function replaced by a null C call. """
+    __slots__ = ()
+
+    def _load(self):
+        return CDLL(find_library("msvcrt" if sys.platform == "win32" else "c"))
+
+    def _resolve(self, suffix):
+        # Indexing returns a new function pointer each time, so each suffix gets its own argtypes
+        return self._clib["labs"]
+
+
+def main(loops: int):
+    scope = NullPS4000A()
+    scope.handle = 0
+
+    null_call = scope._clib["labs"]
+    null_call.argtypes = (c_long,)
+    null_call.restype = c_long
+
+    benches = {
+        "null C call": lambda: null_call(0),
+        "ping_unit": scope.ping_unit,
+        "is_ready": scope.is_ready,
+        "get_no_of_captures": scope.get_no_of_captures,
+        "get_no_of_processed_captures": scope.get_no_of_processed_captures,
+        "flash_led": lambda: scope.flash_led(0),
+        "get_max_down_sample_ratio": lambda: scope.get_max_down_sample_ratio(1000, RATIO_MODE.NONE, 0),
+        "sig_gen_frequency_to_phase": lambda: scope.sig_gen_frequency_to_phase(1e3, INDEX_MODE.SINGLE, 1024),
+        "set_sig_gen_properties_arbitrary": lambda: scope.set_sig_gen_properties_arbitrary(
+            1, 2, 0, 3, SWEEP_TYPE.UP, 0, 0, SIGGEN_TRIG_TYPE.RISING, SIGGEN_TRIG_SOURCE.NONE, 0),
+    }
+
+    print("%-34s %10s" % ("wrapper", "ns/call"))
+    for name, bench in benches.items():
+        bench()  # bind the driver function outside of the timing
+        best = min(timeit.repeat(bench, number=loops, repeat=3))
+        print("%-34s %10.1f" % (name, best / loops * 1e9))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
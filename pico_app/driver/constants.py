@@ -7,32 +7,43 @@ All constants in this file are exposed directly on the Library class specific to
 (rather than importing this file directly) is the supported way of accessing them, since some
 older drivers have different names/values for some of the macros.
 """
+from enum import IntEnum
+from types import MappingProxyType
+from typing import Final
+
 from .errors import UnknownConstantError
 
 
-MIN_DWELL_COUNT = 3
+MIN_DWELL_COUNT: Final[int] = 3
 
-SHOT_SWEEP_TRIGGER_CONTINUOUS_RUN = 0xFFFFFFFF
+SHOT_SWEEP_TRIGGER_CONTINUOUS_RUN: Final[int] = 0xFFFFFFFF
 
 # convenience functions provided in the old python SDK:
 def pico_tag(number):
     """Get the macro name for a given PICO_STATUS value."""
-    try:
-        return PICO_STATUS_LOOKUP[number]
-    except KeyError:
+    # Other values (None, floats...) go through the dict lookup, as before the table
+    if isinstance(number, int) and 0 <= number < _SMALL_STATUS:
+        tag = _SMALL_TAGS[number]
+    else:
+        tag = _LOOKUP_GET(number)
+    if tag is None:
         raise UnknownConstantError("%s is not a known PICO_STATUS value." % number)
+    return tag
 
 
 def pico_num(tag):
     """Resolve the numerical constant associated with a PICO_STATUS macro."""
-    try:
-        return PICO_STATUS[tag]
-    except KeyError:
+    number = _STATUS_GET(tag)
+    if number is None:
         raise UnknownConstantError("%s is not a known PICO_STATUS macro." % tag)
+    return number
 
 
-def make_enum(members):
-    """All C enums with no specific values follow the pattern 0, 1, 2... in the order they are in source."""
+def make_enum(members, name="Enum"):
+    """
+    All C enums with no specific values follow the pattern 0, 1, 2... in the order they are in source.
+    Returns an IntEnum like those of enums.py, members sharing a value are aliases.
+    """
     enum = {}
     for i, member in enumerate(members):
         keys = [member]
@@ -41,7 +52,7 @@ def make_enum(members):
             keys = member
         for key in keys:
             enum[key] = i
-    return enum
+    return IntEnum(name, enum)
 
 
 PICO_STATUS = {
@@ -314,7 +325,14 @@ PICO_STATUS = {
     "PICO_SHADOW_CAL_CORRUPT": 0x10000007,
 }
 
-PICO_STATUS_LOOKUP = {v: k for k, v in PICO_STATUS.items()}
+# Read-only views, built once at import
+PICO_STATUS_LOOKUP = MappingProxyType({v: k for k, v in PICO_STATUS.items()})
+PICO_STATUS = MappingProxyType(PICO_STATUS)
+_STATUS_GET = PICO_STATUS.get
+_LOOKUP_GET = PICO_STATUS_LOOKUP.get
+# Most codes are below 0x400: index them directly, the dict is only used for the few larger ones
+_SMALL_STATUS: Final[int] = 0x400
+_SMALL_TAGS = tuple(PICO_STATUS_LOOKUP.get(number) for number in range(_SMALL_STATUS))
 
 PICO_INFO = {
     "PICO_DRIVER_VERSION": 0x00000000,
@@ -110,6 +110,10 @@ class RANGE(IntEnum):
     RANGE_20V   = 10
     RANGE_50V   = 11
 
+# Limits of the input ranges, computed once
+RANGE_MIN = min(item.value for item in RANGE)
+RANGE_MAX = max(item.value for item in RANGE)
+
 class COUPLING(IntEnum):
     AC = 0 # 1 MOhm impedance, AC coupling. The channel accepts input frequencies from about 1Hz   up to its max -3dB analog bandwidth.
     DC = 1 # 1 MOhm impedance, DC coupling. The scope accepts all input frequencies from zero (DC) up to its max -3dB analog bandwidth.
@@ -0,0 +1,286 @@
+"""
+Hardware-free tests of the PS4000A wrappers: every driver function of NullPS4000A is a null C call
+returning PICO_OK for the handle 0, see bench_wrappers.
+"""
+import threading
+from ctypes import memmove
+
+import numpy as np
+import pytest
+
+from .PS4824A import sig_gen_properties_plan, SIG_GEN_PROPERTIES_DTYPE
+from .bench_wrappers import NullPS4000A
+from .constants import MIN_DWELL_COUNT
+from .errors import InvalidCaptureParameters
+from .enums import CHANNEL, COUPLING, PICO_INFO, RANGE, RATIO_MODE
+
+
+@pytest.fixture
+def scope():
+    scope = NullPS4000A()
+    scope.handle = 0
+    return scope
+
+@pytest.fixture
+def async_scope():
+    """ Scope opened with 'open_unit_async', its handle is written by 'open_unit_progress'. """
+    scope = NullPS4000A()
+    scope.open_unit_async()
+    scope.open_unit_progress()
+    return scope
+
+
+# compile_run_block
+
+def test_open_unit_async_keeps_an_int_handle(async_scope):
+    assert type(async_scope.handle) is int
+
+def test_compile_run_block(scope):
+    run_block = scope.compile_run_block(0, 100, 1)
+    assert run_block() == 0
+    assert run_block() == 0
+    assert scope.status == 0
+
+def test_compile_run_block_after_open_unit_async(async_scope):
+    run_block = async_scope.compile_run_block(0, 100, 1)
+    assert run_block() == 0
+
+
+# make_overlapped_bulk_getter
+
+def test_overlapped_bulk_getter(scope):
+    get_values = scope.make_overlapped_bulk_getter(0, 100, 0, 3, 1, RATIO_MODE.NONE)
+    no_of_samples, overflow = get_values()
+    assert no_of_samples == 100
+    assert overflow.tolist() == [0, 0, 0, 0]
+    # The overflow flags are owned by the getter and reused by each call
+    assert get_values()[1] is overflow
+
+def test_overlapped_bulk_getter_after_open_unit_async(async_scope):
+    get_values = async_scope.make_overlapped_bulk_getter(0, 100, 0, 1, 1, RATIO_MODE.NONE)
+    assert get_values()[0] == 100
+
+
+# Capture ring
+
+@pytest.fixture
+def ring(scope):
+    scope.setup_capture_ring([CHANNEL.A, CHANNEL.B], 16, depth=3)
+    return scope
+
+def complete(scope, slot, status=0):
+    """ Call the ring ready callback as the driver does, with slot + 1 as parameter. """
+    scope._ring_cb(scope.handle, status, slot + 1)
+
+def test_ring_completions_matched_to_their_slot(ring):
+    assert ring.submit_capture(0, 1) == 0
+    assert ring.submit_capture(1, 1) == 0
+    # Completed out of order
+    complete(ring, 1)
+    complete(ring, 0)
+    slot, buffers, n_samples, overflow, _ = ring.reap_capture(timeout=1)
+    assert slot == 1 and buffers is ring._ring_bufs[1] and n_samples == 16 and overflow == 0
+    assert ring.reap_capture(timeout=1)[0] == 0
+
+def test_reap_without_capture_in_flight_does_not_wait(ring):
+    assert ring.reap_capture() is None
+
+def test_unexpected_completion_is_still_queued(ring):
+    complete(ring, 2)
+    complete(ring, 2)
+    assert ring.reap_capture(timeout=1)[0] == 2
+    assert ring.reap_capture(timeout=1)[0] == 2
+
+def test_setup_capture_ring_drops_previous_completions(ring):
+    ring.submit_capture(0, 1)
+    complete(ring, 0)
+    ring.setup_capture_ring([CHANNEL.A], 8, depth=2)
+    assert ring.reap_capture(wait=False) is None
+    assert not ring._inflight
+
+
+# current_power_source
+
+def test_current_power_source_without_open(scope):
+    assert scope.current_power_source() == "PICO_OK"
+
+def test_current_power_source_cache_follows_the_handle(scope, monkeypatch):
+    calls = []
+    monkeypatch.setattr(scope._fns, "CurrentPowerSource", lambda handle: calls.append(handle) or 0)
+    scope.current_power_source()
+    scope.current_power_source()
+    assert calls == [0]
+    scope.handle = 1
+    scope.current_power_source()
+    assert calls == [0, 1]
+
+
+# Data buffers
+
+def test_set_data_buffer_allocates_and_reuses(scope):
+    buffer = scope.set_data_buffer(CHANNEL.A, buffer_length=32)
+    assert buffer.dtype == np.int16 and len(buffer) == 32
+    assert np.shares_memory(scope.set_data_buffer(CHANNEL.A, buffer_length=16), buffer)
+
+def test_get_values_bulk(scope):
+    no_of_samples, overflow = scope.get_values_bulk(64, 0, 3, 1, RATIO_MODE.NONE)
+    assert no_of_samples == 64
+    assert overflow.tolist() == [0, 0, 0, 0]
+
+
+# run_block_many
+
+def ready_at_once(scope, monkeypatch):
+    """ IsReady reporting the capture as ready, the null C call never sets it. """
+    def is_ready(handle, p_ready):
+        p_ready._obj.value = 1
+        return 0
+    monkeypatch.setattr(scope._fns, "IsReady", is_ready)
+
+def test_run_block_many(scope, monkeypatch):
+    ready_at_once(scope, monkeypatch)
+    no_of_samples, overflow = scope.run_block_many(10, 90, 1, 4)
+    assert no_of_samples == 100
+    assert overflow.tolist() == [0, 0, 0, 0]
+
+def test_run_block_many_times_out(scope):
+    assert scope.run_block_many(10, 90, 1, 4, timeout=0.01)[0] == 0
+
+def test_run_block_many_driver_error(scope, monkeypatch):
+    ready_at_once(scope, monkeypatch)
+    monkeypatch.setattr(scope._fns, "GetValuesBulk", lambda *args: 1)
+    no_of_samples, overflow = scope.run_block_many(10, 90, 1, 4)
+    assert no_of_samples == 0 and len(overflow) == 0
+
+
+# wait_ready
+
+def test_wait_ready(scope, monkeypatch):
+    ready_at_once(scope, monkeypatch)
+    assert scope.wait_ready(timeout=1)
+
+def test_wait_ready_times_out(scope):
+    assert not scope.wait_ready(timeout=0.01, poll_interval=0.001)
+
+def test_wait_ready_driver_error(scope):
+    # The null C call returns the handle, a non-zero status here
+    scope.handle = 5
+    assert not scope.wait_ready()
+
+
+# Streaming pump
+
+def test_streaming_pump(scope, monkeypatch):
+    buffer = scope.set_data_buffer(CHANNEL.A, buffer_length=8)
+    buffer[:] = np.arange(8)
+    served = threading.Event()
+
+    def get_latest_values(handle, streaming_ready, p_parameter):
+        # 3 new samples from index 2, overflow on channel A, then nothing new
+        if not served.is_set():
+            streaming_ready(handle, 3, 2, 1, 0, 0, 0, None)
+            served.set()
+        else:
+            streaming_ready(handle, 0, 0, 0, 0, 0, 0, None)
+        return 0
+    monkeypatch.setattr(scope._fns, "GetStreamingLatestValues", get_latest_values)
+
+    scope.start_streaming_pump(interval=0.001)
+    assert served.wait(1)
+    scope.stop_streaming_pump()
+    assert scope._pump_thread is None
+
+    (chunk, overflow), = scope.pop_streaming_chunks()
+    assert chunk[CHANNEL.A].tolist() == [2, 3, 4] and overflow == 1
+    # Copied out of the driver buffer
+    buffer[:] = 0
+    assert chunk[CHANNEL.A].tolist() == [2, 3, 4]
+    assert scope.pop_streaming_chunks() == []
+
+def test_streaming_pump_drops_oldest_chunks(scope):
+    scope.set_data_buffer(CHANNEL.A, buffer_length=8)[:] = np.arange(8)
+    scope.start_streaming_pump(interval=10, maxlen=2)
+    scope.stop_streaming_pump()
+    for i in range(3):
+        scope._on_streaming_ready(0, 1, i, 0, 0, 0, 0, None)
+    assert [chunk[CHANNEL.A].tolist() for chunk, _ in scope.pop_streaming_chunks()] == [[1], [2]]
+
+
+# apply_all
+
+def record_calls(scope, monkeypatch, names, failing=None):
+    calls = []
+    for name in names:
+        def call(*args, name=name):
+            calls.append((name, args[1:]))
+            return 1 if name == failing else 0
+        monkeypatch.setattr(scope._fns, name, call)
+    return calls
+
+def test_apply_all(scope, monkeypatch):
+    calls = record_calls(scope, monkeypatch, ["SetChannel", "SetDigitalPort", "SetBandwidthFilter"])
+    assert scope.apply_all(
+        analog=[(CHANNEL.A, 1, COUPLING.DC, RANGE.RANGE_1V, 0.5), (CHANNEL.B, 0, COUPLING.DC, RANGE.RANGE_1V, 0.0)],
+        bandwidths=[(CHANNEL.A, 1)])
+    assert calls == [
+        ("SetChannel", (CHANNEL.A, 1, COUPLING.DC, RANGE.RANGE_1V, 0.5)),
+        ("SetChannel", (CHANNEL.B, 0, COUPLING.DC, RANGE.RANGE_1V, 0.0)),
+        ("SetBandwidthFilter", (CHANNEL.A, 1)),
+    ]
+
+def test_apply_all_stops_at_the_first_rejected_setting(scope, monkeypatch):
+    calls = record_calls(scope, monkeypatch, ["SetChannel", "SetDigitalPort", "SetBandwidthFilter"], failing="SetChannel")
+    assert not scope.apply_all(
+        analog=[(CHANNEL.A, 1, COUPLING.DC, RANGE.RANGE_1V, 0.0), (CHANNEL.B, 1, COUPLING.DC, RANGE.RANGE_1V, 0.0)],
+        bandwidths=[(CHANNEL.A, 1)])
+    assert [name for name, _ in calls] == ["SetChannel"]
+
+
+# AWG sweep plans
+
+def test_sig_gen_properties_plan_broadcasts():
+    plan = sig_gen_properties_plan([10, 20, 30], [11, 21, 31], dwell_count=MIN_DWELL_COUNT, shots=1)
+    assert plan.dtype == SIG_GEN_PROPERTIES_DTYPE and len(plan) == 3
+    assert plan["start_delta_phase"].tolist() == [10, 20, 30]
+    assert plan["shots"].tolist() == [1, 1, 1]
+
+def test_set_sig_gen_properties_arbitrary_many(scope):
+    plan = sig_gen_properties_plan([10, 20, 30], [11, 21, 31])
+    assert scope.set_sig_gen_properties_arbitrary_many(plan) == 3
+
+def test_set_sig_gen_properties_arbitrary_many_stops_on_error(scope, monkeypatch):
+    steps = []
+    monkeypatch.setattr(scope._fns, "SetSigGenPropertiesArbitrary", 
+                        lambda handle, *step: steps.append(step) or (1 if len(steps) == 2 else 0))
+    plan = sig_gen_properties_plan([10, 20, 30], [11, 21, 31])
+    assert scope.set_sig_gen_properties_arbitrary_many(plan) == 1
+    assert [step[0] for step in steps] == [10, 20]
+    assert all(type(value) is int for value in steps[0])
+
+def test_set_sig_gen_properties_arbitrary_many_checks_the_plan(scope):
+    with pytest.raises(InvalidCaptureParameters):
+        scope.set_sig_gen_properties_arbitrary_many(np.zeros(3, dtype=np.uint32))
+
+
+# get_unit_info
+
+def unit_info_driver(scope, monkeypatch, value: bytes, required_size: int):
+    def get_unit_info(handle, string, string_length, p_required_size, info):
+        memmove(string, value + b'\0', len(value) + 1)
+        p_required_size._obj.value = required_size
+        return 0
+    monkeypatch.setattr(scope._fns, "GetUnitInfo", get_unit_info)
+
+def test_get_unit_info(scope, monkeypatch):
+    unit_info_driver(scope, monkeypatch, b"4824A", 6)
+    assert scope.get_unit_info(PICO_INFO.PICO_VARIANT_INFO) == "4824A"
+
+def test_get_unit_info_size_without_null_character(scope, monkeypatch):
+    unit_info_driver(scope, monkeypatch, b"4824A", 5)
+    assert scope.get_unit_info(PICO_INFO.PICO_VARIANT_INFO) == "4824A"
+
+def test_get_unit_info_ignores_the_previous_string(scope, monkeypatch):
+    unit_info_driver(scope, monkeypatch, b"JO123/0456", 11)
+    scope.get_unit_info(PICO_INFO.PICO_BATCH_AND_SERIAL)
+    unit_info_driver(scope, monkeypatch, b"4824A", 6)
+    assert scope.get_unit_info(PICO_INFO.PICO_VARIANT_INFO) == "4824A"
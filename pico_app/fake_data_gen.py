@@ -5,6 +5,8 @@ from datetime import datetime
 
 import random
 
+from tools import pack_header
+
 # Function to generate a random time (HHMMSS) for a given date
 def get_random_time():
     hour = random.randint(0, 23)
@@ -46,33 +48,34 @@ date_str = f"{specified_date}_{random_time}"
 folder = os.path.join(logging_directory, date_str)
 os.makedirs(folder, exist_ok=True)
 
-# Record files dictionary
-record_file = {}
+# Generate the fake data of all active channels at once, one row per channel
+active_channels = {ch: channel for ch, channel in channels.items() if channel["active"]}
+rng = np.random.default_rng()
+all_data = rng.integers(-32768, 32767, size=(len(active_channels), num_samples), dtype=np.int16)
 
 # Create files and write headers
-for ch, channel in channels.items():
-    if not channel["active"]:
-        continue
-
+for i, (ch, channel) in enumerate(active_channels.items()):
     filename = f"{folder}/picoscope_ch_{ch}.bin"
     
     # Create header
-    header = (
-        f"Time Interval: {sample_interval * unit(time_unit)} {time_unit}\n"
-        f"Scale: {channel['scale']}\n"
-        f"Offset: {channel['offset']}\n\n"
-    )
-    
-    # Open file and write header
-    record_file[ch] = open(filename, 'wb')
-    record_file[ch].write(header.encode('utf-8'))
+    header = pack_header(sample_interval * unit(time_unit), channel['scale'], channel['offset'])
     
-    # Generate fake data and write to file
-    fake_data = np.random.randint(-32768, 32767, num_samples, dtype='int16')
-    fake_data.tofile(record_file[ch])
-    
-    # Close the file
-    record_file[ch].close()
+    # Write header and data in a single write: gathered from both buffers by writev, 
+    # concatenated where writev is not available (Windows)
+    if hasattr(os, 'writev'):
+        fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            written = os.writev(fd, [header, all_data[i]])
+            if written < len(header) + all_data[i].nbytes:
+                # Short write: finish with plain writes of the remaining bytes
+                rest = memoryview(header + all_data[i].tobytes())[written:]
+                while rest:
+                    rest = rest[os.write(fd, rest):]
+        finally:
+            os.close(fd)
+    else:
+        with open(filename, 'wb', buffering=1 << 16) as f:
+            f.write(header + all_data[i].tobytes())
 
 # List generated files
 generated_files = os.listdir(folder)
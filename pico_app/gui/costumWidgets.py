@@ -2,7 +2,7 @@ from PyQt5 import QtWidgets, QtGui, QtCore
 from PyQt5 import uic
 from tools import Channel
 import os
-from driver.enums import RANGE
+from driver.enums import RANGE_MIN, RANGE_MAX
 
 class ClickableLabel(QtWidgets.QLabel):
     clicked = QtCore.pyqtSignal()  # Custom signal for clicks
@@ -35,9 +35,8 @@ class ChannelBtn(QtWidgets.QWidget):
         self.range_label.setText(f"±{label}V")
 
         # Check for styling
-        ranges = [item.value for item in RANGE]
-        self.scale_up.setEnabled(self.channel.range.value != max(ranges))
-        self.scale_down.setEnabled(self.channel.range.value != min(ranges))
+        self.scale_up.setEnabled(self.channel.range.value != RANGE_MAX)
+        self.scale_down.setEnabled(self.channel.range.value != RANGE_MIN)
 
     def apply_range(self, range=None):
         if range:
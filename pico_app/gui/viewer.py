@@ -1,38 +1,55 @@
 import os
 import sys
-from PyQt5 import QtWidgets, uic
+import shutil
+from PyQt5 import QtWidgets, QtGui, uic
 import re
 import pyqtgraph as pg
+from tools import read_channel_file
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-pg.setConfigOptions(antialias=True)
 
 COLORS = ['#d9f175', '#1abc9c','#e67e22', '#3498db', '#9b59b6', '#e74c3c', '#f1c40f', '#2ecc71',  ]
 NAMES = [f"{chr(65+i)}" for i in range(8)]
 
+FOLDER_PATTERN = re.compile(r"(\d{8})_(\d{6})")  # Pattern to extract date and time from folder name
+
 def list_folders_by_date(directory):
     """ Function to list folders by date and time in the given directory. 
     How it works:
-    - Extracts date and time from the folder name
+    - Walks the directory tree with os.scandir, each folder is listed once
+    - Extracts date and time from the name of the folders containing .bin files
     - Creates a dictionary with date as key and list of times as value
     - Returns the dictionary
     """
     date_dict = {}
-    pattern = re.compile(r"(\d{8})_(\d{6})")  # Pattern to extract date and time from folder name
-
-    for root, dirs, files in os.walk(directory):
-        for folder in dirs:
-            folder_path = os.path.join(root, folder)
-            if any(file.endswith('.bin') for file in os.listdir(folder_path)):
-                match = pattern.match(folder)
-                if not match: continue
-                date_str, time_str = match.groups()
-                date_formatted = f"{date_str[2:4]}-{date_str[4:6]}-{date_str[6:8]}"
-                time_formatted = f"{time_str[0:2]}:{time_str[2:4]}:{time_str[4:6]}"
-                
-                if date_formatted not in date_dict:
-                    date_dict[date_formatted] = []
-                date_dict[date_formatted].append((time_formatted, folder_path))
+    with os.scandir(directory) as it:
+        pending = [entry for entry in it if entry.is_dir()]
+
+    while pending:
+        folder = pending.pop()
+        match = FOLDER_PATTERN.match(folder.name)
+        has_bin = False
+        # Symlinked folders are checked for .bin files but not walked into, as os.walk does:
+        # a link to a parent folder would loop forever
+        descend = not folder.is_symlink()
+        # A single pass over the folder finds both its .bin files and its subfolders
+        with os.scandir(folder.path) as it:
+            for entry in it:
+                if entry.is_dir():
+                    if descend:
+                        pending.append(entry)
+                elif match and entry.name.endswith('.bin'):
+                    has_bin = True
+        if not has_bin: continue
+
+        date_str, time_str = match.groups()
+        date_formatted = f"{date_str[2:4]}-{date_str[4:6]}-{date_str[6:8]}"
+        time_formatted = f"{time_str[0:2]}:{time_str[2:4]}:{time_str[4:6]}"
+        
+        if date_formatted not in date_dict:
+            date_dict[date_formatted] = []
+        date_dict[date_formatted].append((time_formatted, folder.path))
 
     return date_dict
 
@@ -41,12 +58,22 @@ class PicoViewer(QtWidgets.QWidget):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         uic.loadUi(os.path.join(os.path.dirname(__file__), "viewer_widget.ui"), self) 
+        # Channel checkboxes by channel name, looked up once
+        self._channel_widgets = {ch: getattr(self, f"channel_{ch}") for ch in NAMES}
         
         # graph: pg.PlotWidget = self.graph
         self.graph.getAxis('bottom').setLabel(text='Time', units='s')
         self.graph.getAxis('left').setLabel(text='Voltage', units='V')
         self.graph.showGrid(x = True, y = True, alpha = 0.5)
         self.graph.addLegend()
+        # Long captures: only the visible range is drawn, reduced to a min/max envelope at screen resolution
+        self.graph.setDownsampling(auto=True, mode='peak')
+        self.graph.setClipToView(True)
+        # Fixed channel colors: one pen per channel, reused by every plot
+        self._pens = {name: pg.mkPen(color) for name, color in zip(NAMES, COLORS)}
+        # Time axis of the last plotted capture, keyed by (dt, number of samples)
+        self._time_key = None
+        self._time = None
 
         self.define_actions()
         
@@ -69,8 +96,8 @@ class PicoViewer(QtWidgets.QWidget):
         self.plot_btn.clicked.connect(self.display_data)
         self.save_note_btn.clicked.connect(self.save_note)
         self.refresh_btn.clicked.connect(self.create_measurements_tree)
-        for ch in NAMES:
-            check_btn: QtWidgets.QCheckBox = getattr(self, f"channel_{ch}")
+        check_btn: QtWidgets.QCheckBox
+        for check_btn in self._channel_widgets.values():
             check_btn.stateChanged.connect(self.change_active_channels)
         self.change_dir_btn.clicked.connect(self.change_directory)
         self.notes.textChanged.connect(self.note_changed)
@@ -78,6 +105,10 @@ class PicoViewer(QtWidgets.QWidget):
 
     def init_user_interface(self):
         self.graph.clear()
+        # Release the curves, and with them the memory-mapped samples of the capture files
+        for plot in getattr(self, 'plots', {}).values():
+            plot.clear()
+        self.plots = {}
         self.notes.setEnabled(False)
         self.save_note_btn.setEnabled(False)
         if hasattr(self, 'selected_item'):
@@ -87,44 +118,23 @@ class PicoViewer(QtWidgets.QWidget):
         """
         Reads the recorded data from multiple binary files in the current directory.
         Returns a dictionary containing headers and data for each channel.
+        The data are read-only memory maps, pages are only read from disk when accessed.
         """
         if not self.data_folder: return None
         
         directory = self.data_folder
 
+        # Iterate over all binary files in the given directory, one reading job per file
+        filepaths = [os.path.join(directory, filename) for filename in os.listdir(directory) if filename.endswith('.bin')]
+        with ThreadPoolExecutor(max_workers=min(8, max(len(filepaths), 1))) as executor:
+            results = list(executor.map(read_channel_file, filepaths))
+
         data_chunk = {}
         headers = {}
-        
-        # Iterate over all binary files in the given directory
-        for filename in os.listdir(directory):
-            if not filename.endswith('.bin'): continue
-            
-            filepath = os.path.join(directory, filename)
-
-            with open(filepath, 'rb') as f:
-                # Read and parse the header
-                header_text = ''
-                while True:
-                    line = f.readline().decode('utf-8')
-                    if line.strip() == '': break # End of header
-                    header_text += line
-                
-                # Extract metadata from the header
-                header = {}
-                for line in header_text.splitlines():
-                    if ':' in line:
-                        key, value = line.split(':', 1)
-                        header[key.strip()] = float(value.split()[0].strip())
-                
-                # Extract channel name from filename
-                channel_name = filename.split('_')[-1].replace('.bin', '')
-                
-                # Read the binary data as int16
-                data = np.fromfile(f, dtype=np.int16)
-                
-                # Store the header and data for the channel
-                headers[channel_name] = header
-                data_chunk[channel_name] = data
+        for channel_name, header, data in results:
+            # Store the header and data for the channel
+            headers[channel_name] = header
+            data_chunk[channel_name] = data
         
         return headers, data_chunk
   
@@ -175,18 +185,21 @@ class PicoViewer(QtWidgets.QWidget):
             date_time_obj = datetime.strptime(f"{date_str} {time_str}", '%y-%m-%d %H:%M:%S')
             folder_name = date_time_obj.strftime('%Y%m%d_%H%M%S')
             data_folder = os.path.join(self.directory, folder_name)
-        
-            if QtWidgets.QMessageBox.question(self, 'Delete Data', f'Are you sure you want to delete this data? {data_folder}', 
-                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No) == QtWidgets.QMessageBox.Yes:
-                for file in os.listdir(data_folder):
-                    os.remove(os.path.join(data_folder, file))
-                os.rmdir(data_folder)
-                self.create_measurements_tree()
-                self.init_user_interface()
-        
         except Exception as e:
             return
 
+        if QtWidgets.QMessageBox.question(self, 'Delete Data', f'Are you sure you want to delete this data? {data_folder}', 
+            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No) != QtWidgets.QMessageBox.Yes:
+            return
+
+        # The plotted capture keeps its files mapped, which prevents their deletion on Windows
+        self.init_user_interface()
+        try:
+            shutil.rmtree(data_folder)
+        except OSError as e:
+            QtWidgets.QMessageBox.critical(self, 'Error', f'The data could not be deleted.\n{e}')
+        self.create_measurements_tree()
+
     def display_data(self):
         
         # Get the selected folder path
@@ -197,6 +210,7 @@ class PicoViewer(QtWidgets.QWidget):
             date_time_obj = datetime.strptime(f"{date_str} {time_str}", '%y-%m-%d %H:%M:%S')
             folder_name = date_time_obj.strftime('%Y%m%d_%H%M%S')
             self.data_folder = os.path.join(self.directory, folder_name)
+            self.notes_path = os.path.join(self.data_folder, 'notes.txt')
         except Exception as e:
             # self.data_folder = None
             return
@@ -215,37 +229,47 @@ class PicoViewer(QtWidgets.QWidget):
         headers, data = self.read_recorded_data()
         
         # Update UI with the loaded data
-        for ch in NAMES:
-            channel_btn = getattr(self, f"channel_{ch}")
+        for channel_btn in self._channel_widgets.values():
             channel_btn.blockSignals(True)
             channel_btn.setChecked(channel_btn.text() in headers.keys())
             channel_btn.setEnabled(channel_btn.text() in headers.keys())
             channel_btn.blockSignals(False)
 
-        # Plot the data
+        # Plot the raw int16 samples: only the drawn part of a capture is ever converted to floats.
+        # The conversion to volts, (raw + offset) * scale / 32767, is the vertical transform of each curve.
         self.plots = {}
-        for i, ch in enumerate(headers.keys()):
-            scale = headers[ch]['Scale']
-            _data = data[ch] + headers[ch]['Offset']
-            dt = np.round(float(headers[ch]['Time Interval']), 6)
-            self.plots[ch] = self.graph.plot(
-                x=np.arange(0, len(_data))*dt, 
-                y=_data*scale/32767, 
-                pen=pg.mkPen(COLORS[NAMES.index(ch)]), 
-                name=ch)
+        for ch, header in headers.items():
+            gain = header['Scale'] / 32767
+            dt = np.round(float(header['Time Interval']), 6)
+            plot = self.graph.plot(
+                x=self.time_axis(dt, len(data[ch])), 
+                y=data[ch], 
+                pen=self._pens[ch], 
+                name=ch,
+                antialias=True,
+                skipFiniteCheck=True)
+            plot.setTransform(QtGui.QTransform(1, 0, 0, gain, 0, header['Offset'] * gain))
+            self.plots[ch] = plot
 
         # Show the user notes
-        if "notes.txt" in os.listdir(self.data_folder):
-            with open(os.path.join(self.data_folder, 'notes.txt'), 'r') as f:
+        if os.path.isfile(self.notes_path):
+            with open(self.notes_path, 'r') as f:
                 self.notes.setPlainText(f.read())
         else:
             self.notes.setPlainText("")
 
+    def time_axis(self, dt: float, n: int) -> np.ndarray:
+        """ Time of n samples spaced by dt, shared by the channels of a capture and by the next identical captures. """
+        if self._time_key != (dt, n):
+            self._time = np.arange(n, dtype=np.float64)*dt
+            self._time_key = (dt, n)
+        return self._time
+
     @property
     def notes_from_file(self) -> str:
-        if not "notes.txt" in os.listdir(self.data_folder):
+        if not os.path.isfile(self.notes_path):
             return 
-        with open(os.path.join(self.data_folder, 'notes.txt'), 'r') as f:
+        with open(self.notes_path, 'r') as f:
             return f.read()
 
     def save_note(self):
@@ -255,11 +279,11 @@ class PicoViewer(QtWidgets.QWidget):
         
         notes = self.notes.toPlainText()
         if notes:
-            with open(os.path.join(self.data_folder, 'notes.txt'), 'w') as f:
+            with open(self.notes_path, 'w') as f:
                 f.write(notes)
         else:
-            if "notes.txt" in os.listdir(self.data_folder):
-                os.remove(os.path.join(self.data_folder, 'notes.txt'))
+            if os.path.isfile(self.notes_path):
+                os.remove(self.notes_path)
         
         self.save_note_btn.setEnabled(False)
         
@@ -267,7 +291,7 @@ class PicoViewer(QtWidgets.QWidget):
         """ Show/hide the selected channels on the graph. """
         if not hasattr(self, 'plots'): return
         for ch, plot in self.plots.items():
-            if getattr(self, f"channel_{ch}").isChecked():
+            if self._channel_widgets[ch].isChecked():
                 plot.show()
             else:
                 plot.hide()
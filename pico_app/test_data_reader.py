@@ -0,0 +1,19 @@
+import numpy as np
+
+from data_reader import read_recorded_data
+from tools import pack_header
+
+
+def test_read_recorded_data(tmp_path):
+    (tmp_path / "picoscope_ch_A.bin").write_bytes(pack_header(1e-3, 5.0, 0.0) + np.arange(4, dtype=np.int16).tobytes())
+    # Cut while recording: the last incomplete sample is left out
+    (tmp_path / "picoscope_ch_B.bin").write_bytes(pack_header(1e-3, 0.5, 1.0) + np.arange(3, dtype=np.int16).tobytes() + b'\x01')
+    (tmp_path / "notes.txt").write_text("not a channel")
+
+    headers, data = read_recorded_data(str(tmp_path))
+    assert sorted(headers) == sorted(data) == ['A', 'B']
+    assert headers['B'] == {'Time Interval': 1e-3, 'Scale': 0.5, 'Offset': 1.0}
+    assert data['A'].tolist() == [0, 1, 2, 3]
+    assert data['B'].tolist() == [0, 1, 2]
+    # Memory-mapped, not loaded
+    assert isinstance(data['A'], np.memmap)
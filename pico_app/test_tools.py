@@ -0,0 +1,119 @@
+import numpy as np
+
+from tools import RingBuffer, m4_downsample, pack_header, parse_header, read_channel_file, BINARY_HEADER
+
+
+# RingBuffer
+
+def test_ring_buffer_partial_fill():
+    buffer = RingBuffer(5)
+    buffer.extend(np.array([1, 2, 3]))
+    assert len(buffer) == 3
+    assert buffer.view().tolist() == [1, 2, 3]
+
+def test_ring_buffer_wraps_around():
+    buffer = RingBuffer(5)
+    buffer.extend(np.array([1, 2, 3, 4]))
+    buffer.extend(np.array([5, 6, 7]))
+    assert len(buffer) == 5
+    assert buffer.view().tolist() == [3, 4, 5, 6, 7]
+    buffer.extend(np.array([8]))
+    assert buffer.view().tolist() == [4, 5, 6, 7, 8]
+
+def test_ring_buffer_keeps_last_values_of_long_extend():
+    buffer = RingBuffer(4)
+    buffer.extend(np.array([1, 2]))
+    buffer.extend(np.arange(10))
+    assert buffer.view().tolist() == [6, 7, 8, 9]
+    buffer.extend(np.array([10]))
+    assert buffer.view().tolist() == [7, 8, 9, 10]
+
+def test_ring_buffer_clear():
+    buffer = RingBuffer(3)
+    buffer.extend(np.array([1, 2, 3, 4]))
+    buffer.clear()
+    assert len(buffer) == 0
+    buffer.extend(np.array([5]))
+    assert buffer.view().tolist() == [5]
+
+
+# m4_downsample
+
+def test_m4_width_larger_than_data_returns_input():
+    x = np.arange(10)
+    y = np.arange(10) * 2
+    x_out, y_out = m4_downsample(x, y, 100)
+    assert x_out is x and y_out is y
+
+def test_m4_small_buckets_return_input():
+    x = np.arange(40)
+    y = np.arange(40)
+    x_out, y_out = m4_downsample(x, y, 10)
+    assert x_out is x and y_out is y
+
+def test_m4_keeps_first_min_max_last_of_each_bucket():
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=1003)
+    x = np.arange(len(y))
+    x_out, y_out = m4_downsample(x, y, 10)
+
+    bucket = len(y) // 10
+    assert len(y_out) == 10 * 4 + len(y) % 10
+    # Points stay in time order and are samples of the input
+    assert np.all(np.diff(x_out) > 0)
+    assert np.array_equal(y_out, y[x_out])
+    for i in range(10):
+        chunk = y[i * bucket:(i + 1) * bucket]
+        kept = y_out[4 * i:4 * i + 4]
+        assert kept[0] == chunk[0] and kept[-1] == chunk[-1]
+        assert kept.min() == chunk.min() and kept.max() == chunk.max()
+    # Samples after the last full bucket are kept as is
+    assert np.array_equal(x_out[40:], np.arange(10 * bucket, len(y)))
+
+
+# parse_header
+
+def test_parse_binary_header():
+    header, offset = parse_header(pack_header(1e-6, 2.0, -0.5) + b'\x01\x00')
+    assert header == {'Time Interval': 1e-6, 'Scale': 2.0, 'Offset': -0.5}
+    assert offset == BINARY_HEADER.size
+
+def test_parse_text_header():
+    raw = b"Time Interval: 0.02 s\nScale: 5.0 V\nOffset: 0.1 V\n\n\x01\x00\x02\x00"
+    header, offset = parse_header(raw)
+    assert header == {'Time Interval': 0.02, 'Scale': 5.0, 'Offset': 0.1}
+    assert raw[offset:] == b'\x01\x00\x02\x00'
+
+def test_parse_text_header_without_data():
+    raw = b"Time Interval: 0.02 s\nScale: 5.0 V\n"
+    header, offset = parse_header(raw)
+    assert header == {'Time Interval': 0.02, 'Scale': 5.0}
+    assert offset == len(raw)
+
+def test_parse_truncated_binary_header_is_not_binary():
+    header, offset = parse_header(pack_header(1e-6, 2.0, 0.0)[:10])
+    assert 'Scale' not in header
+    assert offset == 10
+
+def test_binary_header_size():
+    assert len(pack_header(1e-6, 2.0, 0.0)) == BINARY_HEADER.size == 64
+
+
+# read_channel_file
+
+def test_read_channel_file_drops_incomplete_sample(tmp_path):
+    samples = np.array([1, -2, 3], dtype=np.int16)
+    filepath = tmp_path / "picoscope_ch_B.bin"
+    filepath.write_bytes(pack_header(1e-3, 1.0, 0.0) + samples.tobytes() + b'\x07')
+
+    channel_name, header, data = read_channel_file(str(filepath))
+    assert channel_name == 'B'
+    assert header['Time Interval'] == 1e-3
+    assert data.tolist() == [1, -2, 3]
+
+def test_read_channel_file_without_samples(tmp_path):
+    filepath = tmp_path / "picoscope_ch_A.bin"
+    filepath.write_bytes(pack_header(1e-3, 1.0, 0.0))
+
+    _, _, data = read_channel_file(str(filepath))
+    assert len(data) == 0
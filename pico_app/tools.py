@@ -1,16 +1,157 @@
-from dataclasses import dataclass
-from driver.enums import CHANNEL, RANGE
+from dataclasses import dataclass, field
+from driver.enums import CHANNEL, RANGE, RANGE_MIN, RANGE_MAX
+import os
 import re
+import struct
 import configparser
+from functools import lru_cache
+import numpy as np
 
-@dataclass
+# Header of the recorded channel files: magic, sample interval (s), scale (V), offset (V), padded to 64 bytes
+HEADER_MAGIC = b'PICO'
+BINARY_HEADER = struct.Struct('<4sddd36x')
+# Text header of the older recordings, "Key: value [unit]" lines ended by an empty line.
+# Readers predating the binary header cannot open the new recordings, while 'parse_header' reads both:
+# it is the compatibility path for the recordings made before the change.
+HEADER_PATTERN = re.compile(rb'^([^:\n]+):[ \t]*(\S+)', re.MULTILINE)
+
+def pack_header(interval: float, scale: float, offset: float) -> bytes:
+    """ Binary header written at the start of each recorded channel file, the int16 samples follow. """
+    return BINARY_HEADER.pack(HEADER_MAGIC, interval, scale, offset)
+
+def parse_header(raw: bytes) -> tuple[dict, int]:
+    """ 
+    Header and data offset of a recorded channel file, from its first bytes (4 KiB are enough).
+    Binary headers are unpacked in one call, text headers of older recordings are still read. 
+    A text header without its ending empty line is a file without data.
+    """
+    if raw[:len(HEADER_MAGIC)] == HEADER_MAGIC and len(raw) >= BINARY_HEADER.size:
+        _, interval, scale, offset = BINARY_HEADER.unpack_from(raw)
+        return {'Time Interval': interval, 'Scale': scale, 'Offset': offset}, BINARY_HEADER.size
+
+    header_end = raw.find(b'\n\n')
+    if header_end < 0: header_end = len(raw) # Header only
+    header = {
+        key.decode('utf-8').strip(): float(value) 
+        for key, value in HEADER_PATTERN.findall(raw[:header_end])
+        }
+    return header, min(header_end + 2, len(raw))
+
+def read_channel_file(filepath: str) -> tuple[str, dict, np.ndarray]:
+    """ 
+    Channel name, header and data of a recorded channel file. The data are a read-only memory map of the 
+    int16 samples, a last incomplete sample (file cut while recording) is left out.
+    """
+    # Unbuffered: the header is the only part read through the file, in a single 4 KiB read,
+    # the samples are memory-mapped below
+    with open(filepath, 'rb', buffering=0) as f:
+        raw = f.read(4096)
+
+    # Extract metadata from the header, binary or text
+    header, data_offset = parse_header(raw)
+    n_samples = (os.path.getsize(filepath) - data_offset) // 2
+    
+    # Extract channel name from filename
+    channel_name = os.path.basename(filepath).split('_')[-1].replace('.bin', '')
+    
+    # Map the binary data as int16, pages are only read from disk when accessed
+    if n_samples > 0:
+        data = np.memmap(filepath, dtype=np.int16, mode='r', offset=data_offset, shape=(n_samples,))
+    else:
+        data = np.empty(0, dtype=np.int16)
+    return channel_name, header, data
+
+class RingBuffer:
+    """ 
+    Fixed size rolling buffer of float32 samples. 
+    New samples overwrite the oldest ones, so no memory is allocated while streaming.
+    """
+
+    def __init__(self, size: int = 2000):
+        self._data = np.empty(size, dtype=np.float32)
+        self._index = 0     # Next write position
+        self._filled = 0    # Number of valid samples
+
+    def __len__(self):
+        return self._filled
+
+    @property
+    def size(self):
+        return len(self._data)
+
+    def clear(self):
+        self._index = 0
+        self._filled = 0
+
+    def extend(self, values: np.ndarray):
+        """ Append the values, dropping the oldest samples if the buffer is full. """
+        size = self.size
+        n = len(values)
+
+        # Only the last 'size' values can be kept
+        if n >= size:
+            self._data[:] = values[n - size:]
+            self._index = 0
+            self._filled = size
+            return
+
+        # Write up to the end of the buffer, then wrap around
+        n1 = min(n, size - self._index)
+        self._data[self._index:self._index + n1] = values[:n1]
+        self._data[:n - n1] = values[n1:]
+
+        self._index = (self._index + n) % size
+        self._filled = min(self._filled + n, size)
+
+    def view(self) -> np.ndarray:
+        """ Return the samples in chronological order. """
+        if self._filled < self.size:
+            return self._data[:self._filled]
+        return np.concatenate((self._data[self._index:], self._data[:self._index]))
+
+def m4_downsample(x: np.ndarray, y: np.ndarray, width: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    M4 aggregation for display: split the samples in 'width' buckets (one per pixel column)
+    and keep the first, minimum, maximum and last sample of each of them. 
+    The drawn line is identical to the full resolution one, with at most 4 points per pixel.
+    """
+    bucket = len(y) // max(width, 1)
+    if bucket <= 4: return x, y
+
+    n = bucket * width
+    buckets = y[:n].reshape(width, bucket)
+
+    index = np.empty((width, 4), dtype=np.intp)
+    index[:, 0] = 0
+    index[:, 1] = buckets.argmin(axis=1)
+    index[:, 2] = buckets.argmax(axis=1)
+    index[:, 3] = bucket - 1
+    index.sort(axis=1) # Keep the time order
+    index += np.arange(0, n, bucket)[:, None]
+
+    # The last samples that do not fill a bucket are kept as is
+    index = np.concatenate((index.ravel(), np.arange(n, len(y))))
+    return x[index], y[index]
+
+@lru_cache(maxsize=1)
+def _load_config() -> configparser.ConfigParser:
+    """ Channel configuration, parsed once for all the channels. """
+    config = configparser.ConfigParser()
+    config.read("config.ini")
+    return config
+
+# Unit (V per range unit) and full scale in volts of each input range, parsed once from the names
+_RANGE_UNIT = {r: 1e-3 if 'MV' in r.name else 1. for r in RANGE}
+_RANGE_SCALE = {r: int(re.findall(r'\d+', r.name)[0])*_RANGE_UNIT[r] for r in RANGE}
+
+@dataclass(slots=True)
 class Channel:
     name:str = ""
     active:bool = False
     range: RANGE = RANGE.RANGE_10V
     offset: float = 0
     resolution: int = 12
-    buffer = []
+    buffer: RingBuffer = field(default_factory=RingBuffer)
     max_adc = 32767.
 
     @property
@@ -19,12 +160,11 @@ class Channel:
 
     @property
     def unit(self):
-        return 1e-3 if 'MV' in self.range.name else 1.
+        return _RANGE_UNIT[self.range]
     
     @property
     def scale(self):
-        value = int(re.findall(r'\d+', self.range.name)[0])
-        return value*self.unit
+        return _RANGE_SCALE[self.range]
 
     @property
     def scale_mv(self):
@@ -32,17 +172,15 @@ class Channel:
 
     def next_range(self):
         new_value = self.range.value + 1
-        new_range = RANGE(new_value) if new_value in RANGE._value2member_map_ else None
-        if new_range is None: return False
-        self.range = new_range        
-        return (self.range.value == max(item.value for item in RANGE)) 
+        if new_value > RANGE_MAX: return False
+        self.range = RANGE(new_value)
+        return (self.range.value == RANGE_MAX) 
 
     def prv_range(self):
         new_value = self.range.value - 1
-        new_range = RANGE(new_value) if new_value in RANGE._value2member_map_ else None
-        if new_range is None: return False
-        self.range = new_range
-        return (self.range.value == min(item.value for item in RANGE))
+        if new_value < RANGE_MIN: return False
+        self.range = RANGE(new_value)
+        return (self.range.value == RANGE_MIN)
     
     def save_channel(self):
        return {
@@ -55,9 +193,7 @@ class Channel:
     @classmethod
     def from_dict(cls, name:str, *args, **kwargs):
         try:
-            config = configparser.ConfigParser()
-            config.read("config.ini")
-            settings = dict(config.items(name))
+            settings = dict(_load_config().items(name))
             settings['active'] = settings['active'] == 'True'
             settings['range'] = RANGE(int(settings['range']))
             settings['offset'] = float(settings['offset'])